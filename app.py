@@ -1,28 +1,188 @@
-from flask import Flask, render_template, request, jsonify, send_file
-from models import db, CaseQuery
-from scraper import fetch_case_details, download_judgment, fetch_cause_list
+from flask import (Blueprint, Flask, render_template, request, jsonify, send_from_directory, Response,
+                   stream_with_context, g, current_app)
+from models import db, init_db, CaseChange, DownloadJob, DocumentRef, WatchedCase
+import docstore
+from cache import case_cache, case_key, cause_list_cache, cause_list_key
+from jobs import download_workers, enqueue_download
+from history import query_history, search_cases, write_case_batch, write_query_batch
+from batch_writer import batch_writer, WRITE_MAX_PENDING
+from watchlist import watch_scheduler, add_watch, remove_watch
+from causelist_index import causelist_index
+from prefetch import prefetcher
+from docindex import document_index
+import docindex
+from courts import CaseId
+from scraper import fetch_case_details, fetch_cause_list, iter_case_details, open_cause_list
+from limits import CircuitOpenError
+from sqlalchemy import text
+import limits
+import metrics
+import profiling
+from profiling import profiled
+from log import configure_logging
+from compression import compress_response
+import bulk
+import parsers
+import logging
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timezone
+from itertools import islice
 import json
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///court_cases.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'downloads'
+configure_logging()
 
-# Ensure download directory exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+logger = logging.getLogger(__name__)
 
-# Initialize database
-db.init_app(app)
+WARMUP_CACHE_ENTRIES = int(os.environ.get('WARMUP_CACHE_ENTRIES', '1024'))  # per cache, 0 skips cache warmup
 
-@app.route('/')
+bp = Blueprint('main', __name__)
+
+def create_app(config=None):
+    """
+    Create and configure the application
+
+    Creates missing tables and warms the process up before returning, so
+    under gunicorn with preload_app the work is done once in the master
+    and every forked worker starts warm.
+
+    Args:
+        config (dict): Overrides of the default configuration
+
+    Returns:
+        Flask: The application
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///court_cases.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = docstore.DOCSTORE_DIR
+    # Let a fronting nginx/Apache send documents with X-Sendfile when available,
+    # otherwise the WSGI server's file wrapper streams them with sendfile()
+    app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+    app.config['MAX_BATCH_SIZE'] = int(os.environ.get('MAX_BATCH_SIZE', '500'))
+    app.config.update(config or {})
+
+    # Ensure download directory exists
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    # Initialize database
+    db.init_app(app)
+
+    # Audit records and cache entries are written behind the request
+    batch_writer.init_app(app)
+    batch_writer.register('query', write_query_batch)
+    batch_writer.register('case', write_case_batch)
+    case_cache.write_behind(batch_writer)
+    cause_list_cache.write_behind(batch_writer)
+
+    # Document downloads and indexing, watchlist polling and off-peak prefetching run in the background
+    download_workers.init_app(app)
+    document_index.init_app(app)
+    watch_scheduler.init_app(app)
+    prefetcher.init_app(app)
+    causelist_index.init_app(app)
+    app.before_first_request(start_background_workers)
+
+    app.register_blueprint(bp)
+
+    # flask data export / flask data import
+    app.cli.add_command(bulk.cli)
+
+    with app.app_context():
+        init_db()
+        warmup(app)
+        # Pooled connections must not be shared with forked workers
+        db.session.remove()
+        db.engine.dispose()
+    return app
+
+def warmup(app):
+    """
+    Load what the first requests would otherwise load lazily
+
+    The configured HTML parser backend is checked, so a bad HTML_PARSER
+    fails at startup, and the newest cache entries are read into the
+    in-process tier. The counts are kept in
+    app.extensions['warmup'] for /readyz.
+    """
+    start = time.perf_counter()
+    stats = {'parser': type(parsers.get_parser()).__name__}
+    if WARMUP_CACHE_ENTRIES:
+        stats['case_entries'] = case_cache.warm(WARMUP_CACHE_ENTRIES)
+        stats['cause_list_entries'] = cause_list_cache.warm(WARMUP_CACHE_ENTRIES)
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    app.extensions['warmup'] = stats
+    logger.info("Warmup finished", extra=stats)
+
+def start_background_workers():
+    """
+    Start this process's background threads
+
+    Each worker starts at most once per process, so this is safe to call
+    from every request's first hook and from gunicorn's post_fork.
+    """
+    batch_writer.start()
+    download_workers.start()
+    document_index.start()
+    watch_scheduler.start()
+    prefetcher.start()
+
+@bp.before_app_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@bp.after_app_request
+def record_request(response):
+    # Streamed responses are timed up to their first byte
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    elapsed = time.perf_counter() - g.get('request_start', time.perf_counter())
+    metrics.REQUEST_LATENCY.labels(request.method, endpoint, response.status_code).observe(elapsed)
+    if response.status_code >= 500:
+        metrics.error(f'http_{response.status_code}', endpoint)
+    return response
+
+@bp.after_app_request
+def compress(response):
+    return compress_response(response, request)
+
+@bp.route('/metrics')
+def get_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+@bp.route('/healthz')
+def healthz():
+    # Liveness only, the process is up and answering
+    return jsonify({'status': 'ok'})
+
+@bp.route('/readyz')
+def readyz():
+    checks = {}
+    try:
+        db.session.execute(text('SELECT 1'))
+        checks['database'] = 'ok'
+    except Exception as e:
+        checks['database'] = f'error: {e}'
+    checks['warmup'] = 'ok' if 'warmup' in current_app.extensions else 'pending'
+    # A full write-behind buffer means writes are being dropped
+    checks['batch_writer'] = 'ok' if batch_writer.pending() < WRITE_MAX_PENDING else 'backlogged'
+    
+    ready = all(check == 'ok' for check in checks.values())
+    return jsonify({
+        'ready': ready,
+        'checks': checks,
+        'warmup': current_app.extensions.get('warmup'),
+        'pid': os.getpid(),
+    }), 200 if ready else 503
+
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/api/search', methods=['POST'])
+@bp.route('/api/search', methods=['GET', 'POST'])
+@profiled
 def search_case():
-    data = request.json
+    data = request.args if request.method == 'GET' else (request.json or {})
     case_type = data.get('case_type')
     case_number = data.get('case_number')
     year = data.get('year')
@@ -33,59 +193,218 @@ def search_case():
         return jsonify({'error': 'Missing required fields'}), 400
     
     try:
-        # Record the query in database
-        query = CaseQuery(
-            case_type=case_type,
-            case_number=case_number,
-            year=year,
-            court_type=court_type,
-            court_name=court_name,
-            query_date=datetime.now()
-        )
-        
-        # Fetch case details
-        result = fetch_case_details(court_type, court_name, case_type, case_number, year)
+        query = {
+            'case_type': case_type,
+            'case_number': case_number,
+            'year': year,
+            'court_type': court_type,
+            'court_name': court_name
+        }
         
-        if 'error' in result:
-            query.status = 'error'
-            query.response = json.dumps({'error': result['error']})
-            db.session.add(query)
-            db.session.commit()
-            return jsonify(result), 404
+        # Fetch case details, serving repeat lookups from the cache
+        key = case_key(court_type, court_name, case_type, case_number, year)
+        try:
+            result, hit = case_cache.get_or_fetch(
+                key, lambda: fetch_case_details(court_type, court_name, case_type, case_number, year)
+            )
+        except CircuitOpenError as e:
+            return _circuit_open_response(e, case_cache.get(key, allow_stale=True))
         
-        # Save successful response
-        query.status = 'success'
-        query.response = json.dumps(result)
-        db.session.add(query)
-        db.session.commit()
+        # Record the query in database
+        _record_query(query, result, fresh=not hit)
         
-        return jsonify(result)
+        response = jsonify(result)
+        if 'error' in result:
+            response.status_code = 404
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return _conditional(response, case_cache, key)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/download', methods=['POST'])
+@bp.route('/api/search/batch', methods=['POST'])
+def search_cases_batch():
+    data = request.json or {}
+    cases = data.get('cases')
+    per_court_concurrency = data.get('per_court_concurrency')
+    
+    if not isinstance(cases, list) or not cases:
+        return jsonify({'error': 'Missing required fields'}), 400
+    if len(cases) > current_app.config['MAX_BATCH_SIZE']:
+        return jsonify({'error': f"Batch too large, maximum is {current_app.config['MAX_BATCH_SIZE']} cases"}), 400
+    # Checked here, a bad value would otherwise only fail once the stream has started
+    if per_court_concurrency is not None:
+        try:
+            per_court_concurrency = _positive_int(per_court_concurrency)
+        except ValueError:
+            return jsonify({'error': 'per_court_concurrency must be a positive integer'}), 400
+    
+    # Reject malformed entries up front, the rest are fetched concurrently
+    fields = ('court_type', 'court_name', 'case_type', 'case_number', 'year')
+    queries = {}
+    invalid = []
+    for index, item in enumerate(cases):
+        if isinstance(item, dict) and all(item.get(field) for field in fields):
+            queries[index] = {field: str(item[field]) for field in fields}
+        else:
+            invalid.append(index)
+    
+    def generate():
+        for index in invalid:
+            yield _ndjson({'index': index, 'status': 400, 'result': {'error': 'Missing required fields'}})
+        
+        # Answer cached cases first, only the misses go upstream
+        misses = []
+        for index, query in queries.items():
+            result = case_cache.get(case_key(**query))
+            if result is None:
+                misses.append(index)
+                continue
+            _record_query(query, result, fresh=False)
+            yield _ndjson({'index': index, 'status': 200, 'cache': 'hit', 'query': query, 'result': result})
+        
+        for position, result in iter_case_details([queries[i] for i in misses], per_court_concurrency):
+            index = misses[position]
+            key = case_key(**queries[index])
+            if 'retry_after' in result:
+                # Court circuit is open, fall back to stale data when we have it
+                stale = case_cache.get(key, allow_stale=True)
+                if stale is not None:
+                    yield _ndjson({'index': index, 'status': 200, 'cache': 'stale', 'query': queries[index], 'result': stale})
+                else:
+                    yield _ndjson({'index': index, 'status': 503, 'query': queries[index], 'result': result})
+                continue
+            status = 404 if 'error' in result else 200
+            case_cache.put(key, result)
+            _record_query(queries[index], result, fresh=True)
+            yield _ndjson({'index': index, 'status': status, 'cache': 'miss', 'query': queries[index], 'result': result})
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _positive_int(value):
+    """A JSON number or numeric string as an int of at least 1, raises ValueError otherwise"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f'Not an integer: {value!r}')
+    try:
+        number = int(value)
+    except TypeError:
+        raise ValueError(f'Not an integer: {value!r}')
+    if number < 1:
+        raise ValueError(f'Not positive: {value!r}')
+    return number
+
+def _conditional(response, cache, key):
+    """
+    Add validators and caching headers to a lookup response and answer
+    conditional requests with 304
+
+    The ETag is derived from the response content, and Last-Modified is
+    when the result was fetched from the portal. GET responses may be
+    stored by browsers and proxies until the cached result expires.
+    """
+    if response.status_code != 200:
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
+    # Weak, so the tag stays valid for the compressed representations
+    response.add_etag(weak=True)
+    freshness = cache.freshness(key)
+    if freshness is not None:
+        stored_at, expires_at = freshness
+        response.last_modified = stored_at.replace(tzinfo=timezone.utc)
+        max_age = max(0, int((expires_at - datetime.utcnow()).total_seconds()))
+    else:
+        max_age = 0
+    if request.method == 'GET':
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def _record_query(query, result, fresh):
+    """Queue the audit record of a lookup, fresh results also update the normalized tables"""
+    batch_writer.submit('query', {
+        'query': query,
+        'result': result,
+        'query_date': datetime.now(),
+        'normalize': fresh
+    })
+
+def _ndjson(obj):
+    return json.dumps(obj) + '\n'
+
+def _circuit_open_response(error, stale=None):
+    """Serve stale data while a court's circuit is open, or fail fast with 503"""
+    if stale is not None:
+        response = jsonify(stale)
+        response.headers['X-Cache'] = 'STALE'
+        response.headers['Warning'] = '110 - "Response is Stale"'
+    else:
+        response = jsonify(error.to_result())
+        response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, int(error.retry_after)))
+    return response
+
+@bp.route('/api/download', methods=['POST'])
+@profiled
 def download_document():
-    data = request.json
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
     case_id = data.get('case_id')
     document_type = data.get('document_type')
     
     if not all([case_id, document_type]):
         return jsonify({'error': 'Missing required fields'}), 400
+    if not isinstance(case_id, str) or not isinstance(document_type, str):
+        return jsonify({'error': 'case_id and document_type must be strings'}), 400
     
     try:
-        file_path = download_judgment(case_id, document_type)
-        if 'error' in file_path:
-            return jsonify(file_path), 404
-        
-        return jsonify({'file_path': file_path})
+        CaseId.decode(case_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        job, _ = enqueue_download(case_id, document_type)
+        response = jsonify(job.to_dict())
+        response.status_code = 202 if job.status != 'done' else 200
+        response.headers['Location'] = f'/api/jobs/{job.id}'
+        return response
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/causelist', methods=['POST'])
+@bp.route('/api/documents/search')
+def search_documents():
+    args = request.args
+    if not docindex.fts_available():
+        return jsonify({'error': 'Document search needs SQLite FTS5'}), 501
+    
+    try:
+        results = docindex.search(
+            args.get('q', ''), case_id=args.get('case_id'), document_type=args.get('document_type'),
+            limit=args.get('limit', 20, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'results': results})
+
+@bp.route('/api/documents/status')
+def document_index_status():
+    return jsonify(document_index.status())
+
+@bp.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    job = DownloadJob.query.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@bp.route('/api/causelist', methods=['GET', 'POST'])
+@profiled
 def get_cause_list():
-    data = request.json
+    data = request.args if request.method == 'GET' else (request.json or {})
     court_type = data.get('court_type')
     court_name = data.get('court_name')
     date = data.get('date')
@@ -93,18 +412,319 @@ def get_cause_list():
     if not all([court_type, court_name, date]):
         return jsonify({'error': 'Missing required fields'}), 400
     
+    key = cause_list_key(court_type, court_name, date)
     try:
-        result = fetch_cause_list(court_type, court_name, date)
-        return jsonify(result)
+        # Pages are cut from the cached list, so only the first one goes upstream
+        result, hit = cause_list_cache.get_or_fetch(
+            key, lambda: fetch_cause_list(court_type, court_name, date)
+        )
+        if 'error' in result:
+            return jsonify(result), 404
+        
+        # Without paging or filters the whole list is returned in one document
+        if not any(data.get(param) for param in CAUSE_LIST_PAGE_PARAMS):
+            response = jsonify(result)
+        else:
+            header = {field: value for field, value in result.items() if field != 'cases'}
+            try:
+                limit = max(1, min(int(data.get('limit') or 100), 1000))
+            except (TypeError, ValueError):
+                raise ValueError('Invalid limit') from None
+            page = list(islice(_filter_cause_list(result['cases'], data), limit + 1))
+            next_cursor = page[limit - 1]['serial_no'] if len(page) > limit else None
+            response = jsonify(dict(header, cases=page[:limit], next_cursor=next_cursor))
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return _conditional(response, cause_list_cache, key)
+    
+    except CircuitOpenError as e:
+        return _circuit_open_response(e, cause_list_cache.get(key, allow_stale=True))
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/downloads/<path:filename>')
+@bp.route('/api/causelist/stream', methods=['GET', 'POST'])
+def stream_cause_list():
+    params = request.args if request.method == 'GET' else (request.json or {})
+    court_type = params.get('court_type')
+    court_name = params.get('court_name')
+    date = params.get('date')
+    
+    if not all([court_type, court_name, date]):
+        return jsonify({'error': 'Missing required fields'}), 400
+    
+    try:
+        header, entries, cache_status = _open_cause_list(court_type, court_name, date)
+        if 'error' in header:
+            return jsonify(header), 404
+        entries = _filter_cause_list(entries, params)
+    
+    except CircuitOpenError as e:
+        return _circuit_open_response(e)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # The header goes out first, then one line per entry as it is parsed
+    def generate():
+        yield _ndjson(header)
+        for entry in entries:
+            yield _ndjson(entry)
+    
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['X-Cache'] = cache_status
+    return response
+
+def _open_cause_list(court_type, court_name, date):
+    """
+    Open a cause list from the cache, or fetch it and parse entries lazily
+    
+    Returns:
+        tuple: (header, entries, cache_status) where cache_status is the X-Cache value
+    """
+    cached = cause_list_cache.get(cause_list_key(court_type, court_name, date))
+    if cached is not None:
+        header = {field: value for field, value in cached.items() if field != 'cases'}
+        return header, iter(cached['cases']), 'HIT'
+    header, entries = open_cause_list(court_type, court_name, date)
+    return header, entries, 'MISS'
+
+@bp.route('/api/causelist/aggregate', methods=['POST'])
+def aggregate_cause_lists():
+    data = request.json or {}
+    date = data.get('date')
+    
+    if not date:
+        return jsonify({'error': 'Missing required fields'}), 400
+    
+    # Every configured court is fetched in the background and indexed
+    causelist_index.build_async(date)
+    return jsonify({'date': date, 'status': 'building'}), 202
+
+@bp.route('/api/causelist/aggregate', methods=['GET'])
+def get_cause_list_aggregate():
+    date = request.args.get('date')
+    index = causelist_index.get(date)
+    
+    if index is None:
+        if causelist_index.is_building(date):
+            return jsonify({'date': date, 'status': 'building'}), 202
+        return jsonify({'error': 'No index for this date'}), 404
+    
+    return jsonify(dict(index.stats(), status='building' if causelist_index.is_building(date) else 'ready'))
+
+@bp.route('/api/causelist/search')
+def search_cause_lists():
+    date = request.args.get('date')
+    advocate = request.args.get('advocate')
+    party = request.args.get('party')
+    case_number = request.args.get('case_number')
+    
+    if not date or not any([advocate, party, case_number]):
+        return jsonify({'error': 'date and one of advocate, party or case_number are required'}), 400
+    
+    index = causelist_index.get(date)
+    if index is None:
+        # Start building so a retry can be answered from the index
+        causelist_index.build_async(date)
+        response = jsonify({'date': date, 'status': 'building'})
+        response.headers['Retry-After'] = '5'
+        return response, 202
+    
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    matches = index.search(advocate=advocate, party=party, case_number=case_number, limit=limit)
+    return jsonify({'date': date, 'built_at': index.built_at, 'count': len(matches), 'cases': matches})
+
+CAUSE_LIST_PAGE_PARAMS = ('cursor', 'limit', 'case_type', 'advocate', 'purpose')
+
+def _text_param(params, name):
+    """Stripped string parameter, empty when missing, ValueError for other types such as JSON numbers"""
+    value = params.get(name) or ''
+    if not isinstance(value, str):
+        raise ValueError(f"'{name}' must be a string")
+    return value.strip()
+
+def _filter_cause_list(entries, params):
+    """
+    Lazily apply cursor and filters to cause list entries
+    
+    Args:
+        entries (iterable): Cause list entries in serial number order
+        params (dict): cursor (serial number to resume after), case_type
+            (exact), advocate and purpose (case-insensitive substrings)
+    
+    Raises:
+        ValueError: If the cursor is not a serial number or a filter is not a string
+    """
+    try:
+        cursor = int(params.get('cursor') or 0)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid cursor') from None
+    case_type = _text_param(params, 'case_type').upper()
+    advocate = _text_param(params, 'advocate').lower()
+    purpose = _text_param(params, 'purpose').lower()
+    
+    def matching():
+        for entry in entries:
+            if entry['serial_no'] <= cursor:
+                continue
+            if case_type and entry['case_type'].upper() != case_type:
+                continue
+            if advocate and advocate not in entry['advocate'].lower():
+                continue
+            if purpose and purpose not in entry['purpose'].lower():
+                continue
+            yield entry
+    
+    return matching()
+
+@bp.route('/api/watchlist', methods=['POST'])
+def watch_case():
+    data = request.json or {}
+    fields = ('court_type', 'court_name', 'case_type', 'case_number', 'year')
+    
+    if not all(data.get(field) for field in fields):
+        return jsonify({'error': 'Missing required fields'}), 400
+    
+    try:
+        watch, created = add_watch(*(str(data[field]) for field in fields))
+        return jsonify(watch.to_dict()), 201 if created else 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/watchlist', methods=['GET'])
+def list_watches():
+    watches = WatchedCase.query.order_by(WatchedCase.id).all()
+    return jsonify({'watches': [watch.to_dict() for watch in watches]})
+
+@bp.route('/api/watchlist/<int:watch_id>', methods=['DELETE'])
+def unwatch_case(watch_id):
+    watch = WatchedCase.query.get(watch_id)
+    if watch is None:
+        return jsonify({'error': 'Watch not found'}), 404
+    remove_watch(watch)
+    return '', 204
+
+@bp.route('/api/changes')
+def get_changes():
+    since = request.args.get('since', 0, type=int)
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    
+    # Change ids only grow, so clients resume the feed from the last id they saw
+    changes = (
+        CaseChange.query
+        .filter(CaseChange.id > since)
+        .order_by(CaseChange.id)
+        .limit(limit)
+        .all()
+    )
+    return jsonify({
+        'changes': [change.to_dict() for change in changes],
+        'next_since': changes[-1].id if changes else since
+    })
+
+@bp.route('/api/history')
+def get_history():
+    args = request.args
+    filters = {field: args[field] for field in ('court_type', 'court_name', 'case_type', 'case_number', 'year', 'status')
+               if args.get(field)}
+    
+    try:
+        since = datetime.fromisoformat(args['since']) if args.get('since') else None
+        until = datetime.fromisoformat(args['until']) if args.get('until') else None
+        queries, next_cursor = query_history(
+            filters, since=since, until=until,
+            cursor=args.get('cursor'), limit=args.get('limit', 100, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    include_response = args.get('include_response') in ('1', 'true')
+    return jsonify({
+        'queries': [query.to_dict(include_response) for query in queries],
+        'next_cursor': next_cursor
+    })
+
+@bp.route('/api/cases')
+def get_cases():
+    args = request.args
+    filters = {field: args[field] for field in ('court_type', 'court_name', 'case_type', 'case_number', 'year', 'status')
+               if args.get(field)}
+    
+    try:
+        cases, next_cursor = search_cases(
+            filters, party=args.get('party'),
+            cursor=args.get('cursor'), limit=args.get('limit', 100, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'cases': [case.to_dict() for case in cases], 'next_cursor': next_cursor})
+
+@bp.route('/api/export/<dataset>')
+def export_dataset(dataset):
+    args = request.args
+    fmt = args.get('format', 'parquet' if bulk.pa is not None else 'csv')
+    if dataset not in bulk.DATASETS:
+        return jsonify({'error': f"Unknown dataset '{dataset}'"}), 404
+    try:
+        bulk.check_format(fmt)
+        since = datetime.fromisoformat(args['since']) if args.get('since') else None
+        until = datetime.fromisoformat(args['until']) if args.get('until') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    suffix, mimetype = bulk.FORMATS[fmt]
+    response = Response(stream_with_context(bulk.export_stream(dataset, fmt, since, until)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={dataset}{suffix}'
+    return response
+
+@bp.route('/api/profiles')
+def list_profiles():
+    if not profiling.authorized():
+        return jsonify({'error': f'Send the profiling secret in {profiling.PROFILE_HEADER}'}), 403
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    return jsonify({'profiles': profiling.recent_profiles(limit)})
+
+@bp.route('/api/profiles/<profile_id>')
+def download_profile(profile_id):
+    if not profiling.authorized():
+        return jsonify({'error': f'Send the profiling secret in {profiling.PROFILE_HEADER}'}), 403
+    return send_from_directory(profiling.PROFILE_DIR, f'{profile_id}.prof', as_attachment=True)
+
+@bp.route('/api/prefetch/status')
+def prefetch_status():
+    return jsonify({'last_run': prefetcher.last_run()})
+
+@bp.route('/api/upstream/status')
+def upstream_status():
+    return jsonify(limits.status())
+
+@bp.route('/downloads/<path:filename>')
 def download_file(filename):
-    return send_file(os.path.join(app.config['UPLOAD_FOLDER'], filename), as_attachment=True)
+    blob = docstore.lookup(filename)
+    if blob is None:
+        # Files downloaded before the document store existed
+        return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename, as_attachment=True)
+    
+    docstore.touch(blob)
+    ref = DocumentRef.query.filter_by(sha256=blob.sha256).first()
+    download_name = f'{ref.case_id}_{ref.document_type}.pdf' if ref else os.path.basename(blob.path)
+    
+    # Blobs are immutable, so the content hash is a strong validator. Range
+    # and If-None-Match handling come from conditional responses.
+    return send_from_directory(
+        current_app.config['UPLOAD_FOLDER'], blob.path,
+        as_attachment=True,
+        download_name=download_name,
+        etag=blob.sha256,
+        conditional=True,
+        max_age=86400
+    )
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
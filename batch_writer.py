@@ -0,0 +1,171 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy.exc import OperationalError
+
+import metrics
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# Write-behind settings
+WRITE_BATCH_SIZE = int(os.environ.get('WRITE_BATCH_SIZE', '500'))
+WRITE_FLUSH_INTERVAL = float(os.environ.get('WRITE_FLUSH_INTERVAL', '0.5'))  # seconds
+WRITE_MAX_PENDING = int(os.environ.get('WRITE_MAX_PENDING', '50000'))
+WRITE_MAX_ATTEMPTS = int(os.environ.get('WRITE_MAX_ATTEMPTS', '5'))  # flushes an item may fail before it is dropped
+
+
+class BatchWriter:
+    """
+    Buffer database writes in memory and flush them in bulk from a
+    background thread
+
+    Request handlers call submit() and return without waiting on SQLite's
+    write lock. Items are grouped by kind and handed to the handler
+    registered for that kind, all kinds of one flush share a single
+    transaction. A flush happens when WRITE_BATCH_SIZE items are pending
+    or WRITE_FLUSH_INTERVAL has passed, and once more at shutdown.
+
+    When a batch fails, its items are written one at a time, so an item
+    the database rejects is logged and dropped instead of failing every
+    later flush. When the database itself is unavailable, the items go
+    back to the front of the buffer and are dropped after
+    WRITE_MAX_ATTEMPTS failed flushes.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._handlers = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self.dropped = 0
+
+    def init_app(self, app):
+        if self.app is None:
+            atexit.register(self.flush)
+        self.app = app
+
+    def register(self, kind, handler):
+        """
+        Register the function that writes a batch of items of one kind
+
+        Args:
+            kind (str): Item kind passed to submit()
+            handler (callable): Called with a list of items inside an
+                application context; must not commit
+        """
+        self._handlers[kind] = handler
+
+    def submit(self, kind, item):
+        """Queue an item for the next flush"""
+        with self._lock:
+            if len(self._pending) >= WRITE_MAX_PENDING:
+                # The database has fallen far behind; shed load rather than grow without bound
+                self.dropped += 1
+                return
+            self._pending.append((kind, item, 0))
+            full = len(self._pending) >= WRITE_BATCH_SIZE
+        if full:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the flusher thread once per process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+        thread.start()
+
+    def pending(self):
+        return len(self._pending)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(WRITE_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(WRITE_FLUSH_INTERVAL)
+
+    def flush(self):
+        """
+        Write everything buffered so far
+
+        Returns:
+            int: Number of items written
+        """
+        with self._flush_lock:
+            with self._lock:
+                items, self._pending = self._pending, []
+            if not items:
+                return 0
+
+            with self.app.app_context():
+                try:
+                    self._write(items)
+                    return len(items)
+                except Exception as e:
+                    metrics.error(e, 'batch_writer')
+                    if isinstance(e, OperationalError):
+                        self._requeue(items)
+                        raise
+                    logger.warning("Batch write failed, writing its items one at a time",
+                                   extra={'items': len(items), 'error': str(e)})
+                    return self._write_each(items)
+                finally:
+                    db.session.remove()
+
+    def _write(self, items):
+        """Write items in one transaction, rolled back if any handler fails"""
+        batches = defaultdict(list)
+        for kind, item, _ in items:
+            batches[kind].append(item)
+        try:
+            with metrics.timed('db_commit'):
+                for kind, batch in batches.items():
+                    self._handlers[kind](batch)
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _write_each(self, items):
+        """Write items one by one, dropping those the database rejects"""
+        written = 0
+        for position, (kind, item, attempts) in enumerate(items):
+            try:
+                self._write([(kind, item, attempts)])
+                written += 1
+            except OperationalError as e:
+                # The database is unavailable or locked, which is no fault of the item
+                metrics.error(e, 'batch_writer')
+                self._requeue(items[position:])
+                raise
+            except Exception as e:
+                metrics.error(e, 'batch_writer')
+                self.dropped += 1
+                logger.error("Dropped an item the database rejects", extra={'kind': kind, 'error': str(e)})
+        return written
+
+    def _requeue(self, items):
+        """Put failed items back at the front, within the attempt and buffer limits"""
+        retry = [(kind, item, attempts + 1) for kind, item, attempts in items if attempts + 1 < WRITE_MAX_ATTEMPTS]
+        with self._lock:
+            retry = retry[:max(0, WRITE_MAX_PENDING - len(self._pending))]
+            self._pending[:0] = retry
+        lost = len(items) - len(retry)
+        if lost:
+            self.dropped += lost
+            logger.error("Dropped items after repeated failed flushes", extra={'items': lost})
+
+
+batch_writer = BatchWriter()
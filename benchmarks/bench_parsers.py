@@ -0,0 +1,92 @@
+"""
+Parse benchmarks for every installed HTML backend over the saved fixtures
+
+    pytest benchmarks/bench_parsers.py --benchmark-group-by=group \
+        --benchmark-columns=mean,ops,rounds
+
+The ops column is pages per second. Peak memory of a single parse, as
+measured by tracemalloc, is reported in extra_info (peak_memory_kib),
+visible with --benchmark-json.
+"""
+import json
+import os
+import tracemalloc
+
+import pytest
+
+import parsers
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CASE_PAGES = ["case_pending", "case_disposed"]
+CAUSE_LISTS = ["causelist_small", "causelist_large"]
+
+
+def load_page(name):
+    with open(os.path.join(FIXTURES_DIR, f"{name}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+def expected_result(name, parse):
+    """Saved JSON for the fixture, or the BeautifulSoup result when none was saved"""
+    path = os.path.join(FIXTURES_DIR, f"{name}.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return parse(parsers.get_parser("soup"), load_page(name))
+
+
+def peak_memory_kib(func, html):
+    tracemalloc.start()
+    try:
+        func(html)
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def consume(iterator):
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+@pytest.fixture(params=sorted(parsers.BACKENDS))
+def backend(request):
+    return parsers.get_parser(request.param)
+
+
+@pytest.mark.parametrize("page", CASE_PAGES)
+def test_case_status(benchmark, backend, page):
+    html = load_page(page)
+    benchmark.group = f"case status: {page}"
+    benchmark.extra_info["peak_memory_kib"] = peak_memory_kib(backend.parse_case_status, html)
+
+    result = benchmark(backend.parse_case_status, html)
+
+    assert result == expected_result(page, lambda p, h: p.parse_case_status(h))
+
+
+@pytest.mark.parametrize("page", CAUSE_LISTS)
+def test_cause_list(benchmark, backend, page):
+    html = load_page(page)
+    benchmark.group = f"cause list: {page}"
+    benchmark.extra_info["peak_memory_kib"] = peak_memory_kib(backend.parse_cause_list, html)
+
+    result = benchmark(backend.parse_cause_list, html)
+
+    assert result == expected_result(page, lambda p, h: p.parse_cause_list(h))
+
+
+@pytest.mark.parametrize("page", CAUSE_LISTS)
+def test_cause_list_streaming(benchmark, backend, page):
+    """Entries consumed one by one without building the list, as the streaming endpoint does"""
+    html = load_page(page)
+    benchmark.group = f"cause list streaming: {page}"
+    benchmark.extra_info["peak_memory_kib"] = peak_memory_kib(
+        lambda h: consume(backend.iter_cause_list(h)), html
+    )
+
+    count = benchmark(lambda h: consume(backend.iter_cause_list(h)), html)
+
+    assert count == len(expected_result(page, lambda p, h: p.parse_cause_list(h))["cases"])
@@ -0,0 +1,175 @@
+"""
+Load test the running app at fixed concurrency levels
+
+Start the eCourts stand-in and the app pointed at it, then run:
+
+    python benchmarks/mock_ecourts.py --port 8081 --latency 0.2 --seed 1 &
+    ECOURTS_UPSTREAM=http://127.0.0.1:8081/ python app.py &
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000 --concurrency 1,8,32 --duration 20
+
+Every endpoint is driven at every concurrency level in turn, by that many
+clients each issuing requests back to back. Throughput and p50/p95/p99
+latency are reported per run. Requests draw from --distinct cases and
+cause lists, fewer distinct targets mean more cache hits. A download is
+timed from enqueueing until its job is done.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from courts import CASE_TYPE_CODES, DISTRICT_COURTS, HIGH_COURTS, CaseId  # noqa: E402
+
+ENDPOINTS = ["search", "causelist", "download"]
+JOB_POLL_INTERVAL = 0.05
+
+
+def make_targets(distinct, seed):
+    """Fixed pools of cases and cause lists the clients pick from"""
+    rng = random.Random(seed)
+    courts = [("high", name) for name in HIGH_COURTS] + [("district", name) for name in DISTRICT_COURTS]
+    cases, lists = [], []
+    for _ in range(distinct):
+        court_type, court_name = rng.choice(courts)
+        cases.append({
+            "court_type": court_type,
+            "court_name": court_name,
+            "case_type": rng.choice(CASE_TYPE_CODES),
+            "case_number": str(rng.randint(1, 99999)),
+            "year": str(rng.randint(2010, 2024)),
+        })
+        court_type, court_name = rng.choice(courts)
+        lists.append({
+            "court_type": court_type,
+            "court_name": court_name,
+            "date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        })
+    return cases, lists
+
+
+async def search(session, url, rng, cases, lists):
+    async with session.post(f"{url}/api/search", json=rng.choice(cases)) as response:
+        await response.read()
+        return response.status < 500
+
+
+async def causelist(session, url, rng, cases, lists):
+    async with session.post(f"{url}/api/causelist", json=rng.choice(lists)) as response:
+        await response.read()
+        return response.status < 500
+
+
+async def download(session, url, rng, cases, lists):
+    case = rng.choice(cases)
+    case_id = str(CaseId(case["court_type"], case["court_name"], case["case_number"], case["year"]))
+    body = {"case_id": case_id, "document_type": rng.choice(["order", "judgment"])}
+    async with session.post(f"{url}/api/download", json=body) as response:
+        job = await response.json()
+        if response.status >= 400:
+            return False
+    while job["status"] not in ("done", "failed"):
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+        async with session.get(f"{url}/api/jobs/{job['job_id']}") as response:
+            job = await response.json()
+    return job["status"] == "done"
+
+
+SCENARIOS = {"search": search, "causelist": causelist, "download": download}
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, round(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def to_ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+async def run(url, endpoint, concurrency, duration, targets, seed):
+    scenario = SCENARIOS[endpoint]
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(n, session):
+        nonlocal errors
+        rng = random.Random(f"{seed}-{endpoint}-{n}")
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = await scenario(session, url, rng, *targets)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError):
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(n, session) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+    }
+
+
+def print_table(results):
+    columns = ["endpoint", "concurrency", "requests", "errors", "throughput", "p50_ms", "p95_ms", "p99_ms"]
+    print("  ".join(f"{column:>12}" for column in columns))
+    for result in results:
+        print("  ".join(f"{str(result[column]):>12}" for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="base URL of the app")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma separated subset of " + ", ".join(ENDPOINTS))
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated client counts")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per endpoint and concurrency level")
+    parser.add_argument("--distinct", type=int, default=200, help="distinct cases and cause lists requested")
+    parser.add_argument("--seed", type=int, default=20240715)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    unknown = set(endpoints) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    targets = make_targets(args.distinct, args.seed)
+
+    results = []
+    for endpoint in endpoints:
+        for concurrency in levels:
+            result = asyncio.run(run(args.url.rstrip("/"), endpoint, concurrency, args.duration, targets, args.seed))
+            results.append(result)
+            print(f"{endpoint} x{concurrency}: {result['throughput']} req/s, p99 {result['p99_ms']} ms", file=sys.stderr)
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Regenerate the saved HTML fixtures in benchmarks/fixtures
+
+Small pages are written together with the JSON they must parse to, so
+the benchmarks also check that every backend extracts the right data.
+
+    python benchmarks/make_fixtures.py
+"""
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pages import render_case_page, render_cause_list_page  # noqa: E402
+import scraper  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def save(name, html, expected=None):
+    with open(os.path.join(FIXTURES_DIR, f"{name}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+    if expected is None:
+        return
+    with open(os.path.join(FIXTURES_DIR, f"{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=1)
+        f.write("\n")
+
+
+def case_with_documents(status, case_number):
+    while True:
+        case = scraper.fetch_high_court_case("Delhi", "CWP", case_number, "2019")
+        if case["status"] == status and case["documents"]:
+            return case
+
+
+def cause_list(court_name, size):
+    page = scraper.fetch_cause_list("high", court_name, "2024-07-15")
+    # Long lists are drawn from the generated entries with fresh case numbers
+    sample = page["cases"]
+    entries = []
+    for serial_no in range(1, size + 1):
+        entry = dict(random.choice(sample), serial_no=serial_no)
+        entry["case_number"] = str(random.randint(100, 9999))
+        entries.append(entry)
+    page["cases"] = entries
+    return page
+
+
+def main():
+    random.seed(20240715)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+
+    for name, status, number in [("case_pending", "Pending", "4521"), ("case_disposed", "Disposed", "187")]:
+        case = case_with_documents(status, number)
+        save(name, render_case_page(case), case)
+
+    page = cause_list("Delhi", 25)
+    save("causelist_small", render_cause_list_page(page), page)
+
+    # Too large to keep its JSON around, it is checked against the soup backend instead
+    page = cause_list("Delhi", 1500)
+    save("causelist_large", render_cause_list_page(page))
+
+
+if __name__ == "__main__":
+    main()
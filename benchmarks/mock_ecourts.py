@@ -0,0 +1,159 @@
+"""
+Local stand-in for the eCourts portals
+
+Serves case status pages, cause list pages and documents in the markup
+parsers.py reads, with configurable latency and error rate, so the whole
+app can be load tested without touching the real portals:
+
+    python benchmarks/mock_ecourts.py --port 8081 --latency 0.2 --error-rate 0.01
+    ECOURTS_UPSTREAM=http://127.0.0.1:8081/ python app.py
+
+Pages are generated from the same simulation the scraper uses offline,
+seeded by the request so every run serves the same content. With
+--pages DIR, recorded pages saved as DIR/<key>.html are served instead
+when present, and --record writes every generated page there first.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pages import render_case_page, render_cause_list_page  # noqa: E402
+from courts import CaseId  # noqa: E402
+import scraper  # noqa: E402
+
+
+def page_key(kind, *parts):
+    """File name of a recorded page, e.g. case-high-delhi-cwp-1234-2019"""
+    return "-".join([kind] + [re.sub(r"[^a-z0-9.]+", "_", str(part).lower()) for part in parts])
+
+
+def case_page(court_type, court_name, case_type, case_number, year):
+    # The simulation draws from the module random, seed it so a case always looks the same
+    random.seed(page_key("case", court_type, court_name, case_type, case_number, year))
+    if court_type == "high":
+        case = scraper.fetch_high_court_case(court_name, case_type, case_number, year)
+    else:
+        case = scraper.fetch_district_court_case(court_name, case_type, case_number, year)
+    if "error" in case:
+        return None
+    return render_case_page(case)
+
+
+def cause_list_page(court_type, court_name, date):
+    courts = scraper.HIGH_COURTS if court_type == "high" else scraper.DISTRICT_COURTS
+    if court_name not in courts:
+        return None
+    _, judge, court_hall = scraper._cause_list_header(scraper._cause_list_rng(court_type, court_name, date))
+    return render_cause_list_page({
+        "court": court_name,
+        "date": date,
+        "judge": judge,
+        "court_hall": court_hall,
+        "cases": scraper.iter_cause_list_entries(court_type, court_name, date),
+    })
+
+
+class MockPortal:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, pages_dir=None, record=False):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pages_dir = pages_dir
+        self.record = record
+        self.rng = random.Random()
+        self.served = 0
+        self.errors = 0
+
+    def app(self):
+        app = web.Application(middlewares=[self.simulate])
+        app.router.add_get("/case_status", self.case_status)
+        app.router.add_get("/cause_list", self.cause_list)
+        app.router.add_get("/display_pdf", self.display_pdf)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+    @web.middleware
+    async def simulate(self, request, handler):
+        if request.path == "/stats":
+            return await handler(request)
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="Service Temporarily Unavailable")
+        self.served += 1
+        return await handler(request)
+
+    def _page(self, key, render):
+        path = os.path.join(self.pages_dir, f"{key}.html") if self.pages_dir else None
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        html = render()
+        if html is not None and path and self.record:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        return html
+
+    async def case_status(self, request):
+        q = request.query
+        args = [q.get(name, "") for name in ("court_type", "court_name", "case_type", "case_number", "year")]
+        args[0] = args[0].lower()
+        html = self._page(page_key("case", *args), lambda: case_page(*args))
+        if html is None:
+            raise web.HTTPNotFound(text="Case not found")
+        return web.Response(text=html, content_type="text/html")
+
+    async def cause_list(self, request):
+        q = request.query
+        args = [q.get("court_type", "").lower(), q.get("court_name", ""), q.get("date", "")]
+        html = self._page(page_key("causelist", *args), lambda: cause_list_page(*args))
+        if html is None:
+            raise web.HTTPNotFound(text="Court not found")
+        return web.Response(text=html, content_type="text/html")
+
+    async def display_pdf(self, request):
+        try:
+            case = CaseId.decode(request.query.get("case_id", ""))
+        except ValueError:
+            raise web.HTTPNotFound(text="Document not found")
+        body = scraper._render_document(case, request.query.get("document_type", "order"))
+        return web.Response(body=body, content_type="application/pdf")
+
+    async def stats(self, request):
+        return web.json_response({"served": self.served, "errors": self.errors})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.2, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="uniform +/- variation of the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--pages", help="directory of recorded pages to serve")
+    parser.add_argument("--record", action="store_true", help="save generated pages to --pages")
+    parser.add_argument("--seed", type=int, help="seed latency and errors for repeatable runs")
+    args = parser.parse_args()
+
+    if args.record and not args.pages:
+        parser.error("--record needs --pages")
+    if args.pages:
+        os.makedirs(args.pages, exist_ok=True)
+
+    portal = MockPortal(args.latency, args.jitter, args.error_rate, args.pages, args.record)
+    if args.seed is not None:
+        portal.rng.seed(args.seed)
+    web.run_app(portal.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
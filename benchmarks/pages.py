@@ -0,0 +1,81 @@
+"""
+Render case status and cause list results as eCourts-style HTML pages
+
+The markup mirrors what parsers.py extracts, so a page rendered here and
+parsed back yields the original result. Used to produce the saved
+fixtures and by the mock eCourts server.
+"""
+from html import escape
+
+CASE_FIELDS = [
+    ("case_id", "CNR / Case ID"),
+    ("court", "Court"),
+    ("case_type", "Case Type"),
+    ("case_number", "Case Number"),
+    ("year", "Year"),
+    ("filing_date", "Filing Date"),
+    ("next_hearing_date", "Next Hearing Date"),
+    ("status", "Case Status"),
+]
+
+CAUSE_LIST_COLUMNS = [
+    "serial_no", "case_type", "case_type_full", "case_number",
+    "year", "parties", "purpose", "advocate",
+]
+
+_HEAD = (
+    "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title>"
+    "<link rel=\"stylesheet\" href=\"/css/ecourts.css\"></head>\n<body>\n"
+    "<div id=\"header\"><img src=\"/images/emblem.png\" alt=\"Emblem\">"
+    "<h1>eCourts Services</h1><ul class=\"nav\"><li><a href=\"/\">Home</a></li>"
+    "<li><a href=\"/case_status\">Case Status</a></li><li><a href=\"/cause_list\">Cause List</a></li></ul></div>\n"
+)
+_FOOT = "<div id=\"footer\">Content owned by eCourts Services. Designed and hosted by NIC.</div>\n</body></html>\n"
+
+
+def render_case_page(case):
+    """Render a fetch_case_details result as a case status page"""
+    rows = "".join(
+        f"<tr data-field=\"{field}\"><th>{label}</th><td>{escape(str(case.get(field, '')))}</td></tr>\n"
+        for field, label in CASE_FIELDS
+    )
+    parties = case.get("parties", {})
+    docs = "".join(
+        f"<tr data-id=\"{escape(doc['id'])}\"><td class=\"type\">{escape(doc['type'])}</td>"
+        f"<td class=\"date\">{escape(doc['date'])}</td>"
+        f"<td><a href=\"/display_pdf?id={escape(doc['id'])}\">View</a></td></tr>\n"
+        for doc in case.get("documents", [])
+    )
+    return (
+        _HEAD.format(title="Case Status")
+        + "<div id=\"caseStatus\">\n<table id=\"caseDetails\" class=\"case_details_table\">\n"
+        + rows
+        + "</table>\n<h3>Petitioner and Advocate</h3>\n"
+        + f"<p class=\"petitioner\">{escape(parties.get('petitioner', ''))}</p>\n"
+        + "<h3>Respondent and Advocate</h3>\n"
+        + f"<p class=\"respondent\">{escape(parties.get('respondent', ''))}</p>\n"
+        + "<h3>Orders</h3>\n<table id=\"orders\" class=\"order_table\">\n"
+        + "<thead><tr><th>Type</th><th>Date</th><th>Document</th></tr></thead>\n<tbody>\n"
+        + docs
+        + "</tbody></table>\n</div>\n"
+        + _FOOT
+    )
+
+
+def render_cause_list_page(cause_list):
+    """Render a fetch_cause_list result as a cause list page"""
+    header = (
+        f"<div id=\"causeList\" data-court=\"{escape(cause_list['court'])}\" data-date=\"{escape(cause_list['date'])}\">\n"
+        f"<p class=\"judge\">{escape(cause_list.get('judge', ''))}</p>\n"
+        f"<p class=\"court-hall\">{escape(cause_list.get('court_hall', ''))}</p>\n"
+        "<table class=\"cause_list_table\">\n<thead><tr>"
+        + "".join(f"<th>{column}</th>" for column in CAUSE_LIST_COLUMNS)
+        + "</tr></thead>\n<tbody>\n"
+    )
+    entries = "".join(
+        "<tr class=\"entry\">"
+        + "".join(f"<td class=\"{column}\">{escape(str(entry[column]))}</td>" for column in CAUSE_LIST_COLUMNS)
+        + "</tr>\n"
+        for entry in cause_list["cases"]
+    )
+    return _HEAD.format(title="Cause List") + header + entries + "</tbody></table>\n</div>\n" + _FOOT
@@ -0,0 +1,469 @@
+"""
+Bulk export and import
+
+The query history and the stored case and cause-list results are
+exported to Parquet, Arrow IPC streams or gzip CSV, and imported again to
+seed the database and result cache of a new deployment. Rows are read in
+keyset chunks of EXPORT_CHUNK_SIZE and each chunk is written out before
+the next is read, so memory stays flat however large the tables are.
+
+Parquet and Arrow need pyarrow (`pip install pyarrow`), gzip CSV works
+without it.
+"""
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import DateTime, String, select, type_coerce
+
+from cache import write_cache_rows
+from history import store_case
+from models import db, init_db, CachedResult, CaseQuery
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.json as pa_json
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = pa_json = pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '50000'))  # rows per chunk and Parquet row group
+EXPORT_COMPRESSION = os.environ.get('EXPORT_COMPRESSION', 'zstd')  # Parquet and Arrow codec
+
+FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrows', 'application/vnd.apache.arrow.stream'),
+    'csv': ('.csv.gz', 'application/gzip'),
+}
+
+# Result kinds worth carrying over, the prefetcher's run claims are not
+RESULT_KINDS = ('case', 'causelist')
+
+
+class Dataset:
+    """
+    An exportable table
+
+    Args:
+        table: SQLAlchemy table the rows come from
+        stored (list): (column, arrow type name) pairs read from and written back to the table
+        date_column (str): Column that since/until filter on
+        derived (list): (column, arrow type name) pairs computed by derive, export only
+        derive: Function of a chunk's stored columns returning the derived columns
+        where: Extra filter on the rows exported
+    """
+
+    def __init__(self, table, stored, date_column, derived=(), derive=None, where=None):
+        self.table = table
+        self.stored = list(stored)
+        self.date_column = date_column
+        self.derived = list(derived)
+        self.derive = derive
+        self.where = where
+
+    @property
+    def columns(self):
+        return [name for name, _ in self.stored + self.derived]
+
+    def schema(self):
+        types = {'int64': pa.int64(), 'string': pa.string(), 'timestamp': pa.timestamp('us')}
+        return pa.schema([(name, types[kind]) for name, kind in self.stored + self.derived])
+
+
+# Fields of the stored response exported as columns of their own, (column, path in the JSON)
+RESPONSE_FIELDS = [
+    ('case_id', ('case_id',)), ('case_status', ('status',)), ('filing_date', ('filing_date',)),
+    ('next_hearing_date', ('next_hearing_date',)), ('petitioner', ('parties', 'petitioner')),
+    ('respondent', ('parties', 'respondent')), ('error', ('error',)),
+]
+
+
+def _response_columns(responses):
+    """
+    Flatten RESPONSE_FIELDS of a chunk of stored responses into columns
+
+    With pyarrow the whole chunk is parsed at once by its JSON reader,
+    several times faster than json.loads row by row. Responses are written
+    by json.dumps, so each one is a single line.
+    """
+    if pa is None:
+        columns = [[] for _ in RESPONSE_FIELDS]
+        for response in responses:
+            response = json.loads(response) if response else {}
+            for column, (_, path) in zip(columns, RESPONSE_FIELDS):
+                value = response
+                for field in path:
+                    value = value.get(field) if isinstance(value, dict) else None
+                column.append(value)
+        return columns
+
+    lines = '\n'.join(response or '{}' for response in responses).encode('utf-8')
+    table = pa_json.read_json(io.BytesIO(lines), parse_options=_response_parse_options())
+    columns = []
+    for _, path in RESPONSE_FIELDS:
+        column = table.column(path[0])
+        for field in path[1:]:
+            column = pc.struct_field(column, field)
+        columns.append(column)
+    return columns
+
+
+def _response_parse_options():
+    fields = {}
+    for _, path in RESPONSE_FIELDS:
+        if len(path) == 1:
+            fields[path[0]] = pa.string()
+        else:
+            fields.setdefault(path[0], []).append((path[1], pa.string()))
+    schema = pa.schema([(name, kind if not isinstance(kind, list) else pa.struct(kind)) for name, kind in fields.items()])
+    return pa_json.ParseOptions(explicit_schema=schema, unexpected_field_behavior='ignore')
+
+
+DATASETS = {
+    'queries': Dataset(
+        CaseQuery.__table__,
+        stored=[
+            ('id', 'int64'), ('query_date', 'timestamp'), ('court_type', 'string'), ('court_name', 'string'),
+            ('case_type', 'string'), ('case_number', 'string'), ('year', 'string'), ('status', 'string'),
+            ('response', 'string'),
+        ],
+        date_column='query_date',
+        derived=[(name, 'string') for name, _ in RESPONSE_FIELDS],
+        derive=lambda columns: _response_columns(columns[-1]),
+    ),
+    'results': Dataset(
+        CachedResult.__table__,
+        stored=[
+            ('kind', 'string'), ('cache_key', 'string'), ('stored_at', 'timestamp'),
+            ('expires_at', 'timestamp'), ('payload', 'string'),
+        ],
+        date_column='stored_at',
+        where=CachedResult.__table__.c.kind.in_(RESULT_KINDS),
+    ),
+}
+
+
+def check_format(fmt):
+    """Raise ValueError for an unknown format or one whose library is missing"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}")
+    if fmt != 'csv' and pa is None:
+        raise ValueError(f"The {fmt} format needs pyarrow, install it or use csv")
+
+
+def format_for_path(path):
+    """Format implied by a file name, e.g. history.parquet -> parquet"""
+    for fmt, (suffix, _) in FORMATS.items():
+        if path.endswith(suffix) or (fmt == 'arrow' and path.endswith('.arrow')):
+            return fmt
+    raise ValueError(f"Cannot tell the format of '{path}', pass --format")
+
+
+def iter_chunks(dataset, since=None, until=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Rows of a dataset in id order, chunk_size at a time
+
+    Each chunk is a separate keyset query on the primary key, so no
+    cursor stays open between chunks and every chunk costs the same.
+    Timestamps come back as the driver returns them, strings on SQLite,
+    which skips parsing every value in Python.
+    """
+    table = dataset.table
+    columns = [
+        type_coerce(table.c[name], String).label(name) if kind == 'timestamp' else table.c[name]
+        for name, kind in dataset.stored
+    ]
+    last_id = 0
+    while True:
+        statement = select(table.c.id.label('_key'), *columns).where(table.c.id > last_id)
+        if dataset.where is not None:
+            statement = statement.where(dataset.where)
+        if since is not None:
+            statement = statement.where(table.c[dataset.date_column] >= since)
+        if until is not None:
+            statement = statement.where(table.c[dataset.date_column] < until)
+        rows = db.session.execute(statement.order_by(table.c.id).limit(chunk_size)).all()
+        if not rows:
+            return
+        last_id = rows[-1]._key
+        yield rows
+
+
+class _Sink:
+    """Write-only file object whose contents are taken out as they arrive"""
+
+    def __init__(self):
+        self._parts = []
+        self._size = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def export_stream(dataset_name, fmt, since=None, until=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Export a dataset as a stream of bytes, must be consumed within an
+    application context
+
+    Args:
+        dataset_name (str): 'queries' or 'results'
+        fmt (str): 'parquet', 'arrow' or 'csv'
+        since (datetime): Only rows at or after this time
+        until (datetime): Only rows before this time
+        chunk_size (int): Rows read and encoded at a time
+
+    Yields:
+        bytes: The encoded file, piece by piece
+    """
+    check_format(fmt)
+    dataset = DATASETS[dataset_name]
+    sink = _Sink()
+    if fmt == 'csv':
+        writer = _CsvWriter(sink, dataset)
+    elif fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, dataset.schema(), compression=EXPORT_COMPRESSION)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=EXPORT_COMPRESSION)
+        writer = pa.ipc.new_stream(sink, dataset.schema(), options=options)
+
+    rows_written = 0
+    start = time.perf_counter()
+    for rows in iter_chunks(dataset, since, until, chunk_size):
+        columns = list(zip(*rows))[1:]
+        if dataset.derive is not None:
+            columns += dataset.derive(columns)
+        if fmt == 'csv':
+            writer.write_columns(columns)
+        else:
+            writer.write_table(_arrow_table(columns, dataset.schema()))
+        rows_written += len(rows)
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+    logger.info("Export finished", extra={
+        'dataset': dataset_name, 'format': fmt, 'rows': rows_written,
+        'seconds': round(time.perf_counter() - start, 3),
+    })
+
+
+def _arrow_table(columns, schema):
+    arrays = []
+    for column, field in zip(columns, schema):
+        if not isinstance(column, (pa.Array, pa.ChunkedArray)):
+            # Timestamps may arrive as strings, which Arrow parses faster than Python
+            column = pa.array(column, type=None if pa.types.is_timestamp(field.type) else field.type)
+        arrays.append(column.cast(field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class _CsvWriter:
+    """Gzip CSV with a header row, the same write/close shape as the Arrow writers"""
+
+    def __init__(self, sink, dataset):
+        self._gzip = gzip.GzipFile(fileobj=sink, mode='wb', compresslevel=6, mtime=0)
+        self._write_rows([dataset.columns])
+
+    def write_columns(self, columns):
+        columns = [column.to_pylist() if pa is not None and isinstance(column, pa.ChunkedArray) else column
+                   for column in columns]
+        self._write_rows(zip(*columns))
+
+    def _write_rows(self, rows):
+        text = io.StringIO()
+        csv.writer(text).writerows(rows)
+        self._gzip.write(text.getvalue().encode('utf-8'))
+
+    def close(self):
+        self._gzip.close()
+
+
+def _read_csv(path, dataset, chunk_size):
+    """Stored columns of a gzip CSV export, chunk_size rows at a time"""
+    with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(name) for name, _ in dataset.stored]
+        while True:
+            records = list(islice(reader, chunk_size))
+            if not records:
+                return
+            columns = []
+            for position, (_, kind) in zip(positions, dataset.stored):
+                convert = {'timestamp': datetime.fromisoformat, 'int64': int}.get(kind)
+                values = [record[position] or None for record in records]
+                if convert is not None:
+                    values = [convert(value) if value is not None else None for value in values]
+                columns.append(values)
+            yield columns
+
+
+def read_chunks(path, dataset_name, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stored columns of an exported file, as a list of per-column value lists
+    in the order of the dataset's stored columns
+
+    Columns derived from the stored response on export are ignored.
+    """
+    check_format(fmt)
+    dataset = DATASETS[dataset_name]
+    names = [name for name, _ in dataset.stored]
+    if fmt == 'csv':
+        yield from _read_csv(path, dataset, chunk_size)
+    elif fmt == 'parquet':
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=names):
+            yield [batch.column(name).to_pylist() for name in names]
+    else:
+        with pa.OSFile(path, 'rb') as source:
+            for batch in pa.ipc.open_stream(source):
+                yield [batch.column(name).to_pylist() for name in names]
+
+
+def _insert(table, names, columns):
+    """
+    Bulk insert columns of values with one executemany on the driver
+
+    SQLAlchemy's per-row parameter processing would cost more than the
+    insert itself, so values are passed as the driver takes them. SQLite
+    stores timestamps as the same strings SQLAlchemy writes.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        columns = [
+            [value.isoformat(' ', 'microseconds') if value is not None else None for value in column]
+            if isinstance(table.c[name].type, DateTime) else column
+            for name, column in zip(names, columns)
+        ]
+    compiled = table.insert().compile(dialect=connection.dialect, column_keys=names)
+    if compiled.positional:
+        params = list(zip(*(columns[names.index(key)] for key in compiled.positiontup)))
+    else:
+        params = [dict(zip(names, values)) for values in zip(*columns)]
+    connection.exec_driver_sql(str(compiled), params)
+
+
+def import_file(path, dataset_name, fmt, normalize=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Load an export into the database, must be called within an application context
+
+    Queries are appended to case_query under new ids. Results are upserted
+    into cached_result, where a newer row of the same key wins, and are
+    served from there on the first lookup. Every chunk is committed on its
+    own, so an interrupted import keeps what it has loaded.
+
+    Args:
+        path (str): Exported file
+        dataset_name (str): 'queries' or 'results'
+        fmt (str): 'parquet', 'arrow' or 'csv'
+        normalize (bool): Also rebuild the normalized case tables from
+            successful queries, much slower than the plain insert
+        chunk_size (int): Rows inserted per statement and commit
+
+    Returns:
+        int: Rows imported
+    """
+    dataset = DATASETS[dataset_name]
+    names = [name for name, _ in dataset.stored]
+    imported = 0
+    for columns in read_chunks(path, dataset_name, fmt, chunk_size):
+        if dataset_name == 'queries':
+            _insert(dataset.table, names[1:], columns[1:])  # new ids
+            if normalize:
+                _normalize([dict(zip(names, values)) for values in zip(*columns)])
+        else:
+            write_cache_rows([dict(zip(names, values)) for values in zip(*columns)])
+        db.session.commit()
+        imported += len(columns[0])
+    return imported
+
+
+def _normalize(rows):
+    """Store the newest successful result of every case in a chunk"""
+    latest = {}
+    for row in rows:
+        if row['status'] == 'success' and row['response']:
+            query = {field: row[field] for field in ('court_type', 'court_name', 'case_type', 'case_number', 'year')}
+            key = tuple(query.values())
+            if key not in latest or row['query_date'] >= latest[key][2]:
+                latest[key] = (query, row['response'], row['query_date'])
+    for query, response, _ in latest.values():
+        store_case(query, json.loads(response))
+
+
+def parse_time(value):
+    """ISO timestamp of a since/until option, None when empty"""
+    return datetime.fromisoformat(value) if value else None
+
+
+cli = AppGroup('data', help='Bulk export and import of query history and cached results.')
+
+
+@cli.command('export')
+@click.argument('dataset', type=click.Choice(list(DATASETS)))
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(list(FORMATS)), help='Defaults to the format of the file name.')
+@click.option('--since', help='Only rows at or after this ISO timestamp.')
+@click.option('--until', help='Only rows before this ISO timestamp.')
+@click.option('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, show_default=True)
+def export_command(dataset, path, fmt, since, until, chunk_size):
+    """Export DATASET (queries or results) to PATH."""
+    try:
+        fmt = fmt or format_for_path(path)
+        check_format(fmt)
+        since, until = parse_time(since), parse_time(until)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    start = time.perf_counter()
+    size = 0
+    with open(path, 'wb') as f:
+        for data in export_stream(dataset, fmt, since, until, chunk_size):
+            f.write(data)
+            size += len(data)
+    click.echo(f"Exported {dataset} to {path} ({size} bytes) in {time.perf_counter() - start:.2f}s")
+
+
+@cli.command('import')
+@click.argument('dataset', type=click.Choice(list(DATASETS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(list(FORMATS)), help='Defaults to the format of the file name.')
+@click.option('--normalize', is_flag=True, help='Also rebuild the normalized case tables from the queries.')
+@click.option('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, show_default=True)
+def import_command(dataset, path, fmt, normalize, chunk_size):
+    """Import DATASET (queries or results) from PATH."""
+    try:
+        fmt = fmt or format_for_path(path)
+        check_format(fmt)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    init_db()
+    start = time.perf_counter()
+    rows = import_file(path, dataset, fmt, normalize=normalize, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    click.echo(f"Imported {rows} {dataset} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+import metrics
+from models import db, CachedResult
+
+# Cache settings, TTLs in seconds
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '2048'))
+CASE_TTL_DISPOSED = int(os.environ.get('CASE_TTL_DISPOSED', str(7 * 24 * 3600)))
+CASE_TTL_PENDING = int(os.environ.get('CASE_TTL_PENDING', '3600'))
+CAUSE_LIST_TTL = int(os.environ.get('CAUSE_LIST_TTL', str(12 * 3600)))
+
+
+def case_key(court_type, court_name, case_type, case_number, year):
+    """
+    Normalize a case identity into a cache key
+
+    'High', ' Delhi ', 'cwp', '0123', '2022' and 'high', 'Delhi', 'CWP',
+    '123', '2022' refer to the same case and map to the same key.
+    """
+    number = str(case_number).strip().lstrip('0') or '0'
+    return '|'.join([
+        str(court_type).strip().lower(),
+        ' '.join(str(court_name).split()).lower(),
+        str(case_type).strip().upper(),
+        number,
+        str(year).strip(),
+    ])
+
+
+def cause_list_key(court_type, court_name, date):
+    """Normalize a cause list identity into a cache key"""
+    return '|'.join([
+        str(court_type).strip().lower(),
+        ' '.join(str(court_name).split()).lower(),
+        str(date).strip(),
+    ])
+
+
+def case_ttl(result):
+    """Disposed cases rarely change, pending ones can change at every hearing"""
+    if result.get('status') == 'Disposed':
+        return CASE_TTL_DISPOSED
+    return CASE_TTL_PENDING
+
+
+class ResultCache:
+    """
+    Read-through cache with an in-process LRU tier and a persistent tier
+
+    The in-process tier is a bounded LRU dict local to the worker. The
+    persistent tier lives in the CachedResult table so entries survive
+    restarts and are shared by every worker using the same database.
+    Error results are never cached. Cached values are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, kind, ttl, max_entries=CACHE_MAX_ENTRIES):
+        self.kind = kind
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.writer = None
+
+    def write_behind(self, writer):
+        """Persist new entries through a BatchWriter instead of committing inline"""
+        self.writer = writer
+        writer.register('cache', write_cache_rows)
+
+    def get(self, key, allow_stale=False):
+        """
+        Return the cached value for key, or None on a miss
+
+        With allow_stale, expired entries still in the persistent tier are
+        returned too. Used when the upstream court is unavailable.
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, _, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._count('hit')
+                    return value
+                del self._entries[key]
+
+        row = CachedResult.query.filter_by(kind=self.kind, cache_key=key).first()
+        if row is None or (row.expires_at <= now and not allow_stale):
+            self._count('miss')
+            return None
+        if row.expires_at <= now:
+            self._count('stale')
+            return json.loads(row.payload)
+        value = json.loads(row.payload)
+        self._remember(key, value, row.stored_at, row.expires_at)
+        self._count('hit')
+        return value
+
+    def put(self, key, value, ttl=None):
+        """
+        Store a successful result in both tiers
+
+        Args:
+            key (str): Normalized cache key
+            value (dict): Result to store
+            ttl (float): Seconds to keep it, instead of the cache's own TTL
+        """
+        if 'error' in value:
+            return
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl(value) if ttl is None else ttl)
+        self._remember(key, value, now, expires_at)
+
+        if self.writer is not None:
+            self.writer.submit('cache', {
+                'kind': self.kind, 'cache_key': key, 'payload': json.dumps(value),
+                'stored_at': now, 'expires_at': expires_at,
+            })
+            return
+
+        row = CachedResult.query.filter_by(kind=self.kind, cache_key=key).first()
+        if row is None:
+            row = CachedResult(kind=self.kind, cache_key=key)
+            db.session.add(row)
+        row.payload = json.dumps(value)
+        row.stored_at = now
+        row.expires_at = expires_at
+        db.session.commit()
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return (value, hit), calling fetch() and caching its result on a miss
+
+        Args:
+            key (str): Normalized cache key
+            fetch (callable): Called without arguments to produce the value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = fetch()
+        self.put(key, value)
+        return value, False
+
+    def freshness(self, key):
+        """
+        Return (stored_at, expires_at) of an entry in the in-process tier, or None
+
+        Every value returned by get() or stored by put() is in that tier
+        until it is evicted, so this answers for a value just served.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[1:] if entry is not None else None
+
+    def warm(self, limit=None):
+        """
+        Load the most recently stored unexpired entries into the in-process tier
+
+        Called at startup so the first requests of a worker are served
+        from memory. Must be called within an application context.
+
+        Args:
+            limit (int): Entries to load, at most max_entries
+
+        Returns:
+            int: Number of entries loaded
+        """
+        limit = self.max_entries if limit is None else min(limit, self.max_entries)
+        rows = (
+            CachedResult.query
+            .filter(CachedResult.kind == self.kind, CachedResult.expires_at > datetime.utcnow())
+            .order_by(CachedResult.stored_at.desc())
+            .limit(limit)
+            .all()
+        )
+        # Oldest first, so the newest entries end up most recently used
+        for row in reversed(rows):
+            self._remember(row.cache_key, json.loads(row.payload), row.stored_at, row.expires_at)
+        return len(rows)
+
+    def _count(self, result):
+        metrics.CACHE_LOOKUPS.labels(self.kind, result).inc()
+
+    def _remember(self, key, value, stored_at, expires_at):
+        with self._lock:
+            self._entries[key] = (value, stored_at, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def write_cache_rows(rows):
+    """Upsert a batch of CachedResult rows, the last write of a key wins"""
+    latest = {(row['kind'], row['cache_key']): row for row in rows}
+    # SQLite and PostgreSQL share the ON CONFLICT upsert syntax
+    insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    statement = insert(CachedResult.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=['kind', 'cache_key'],
+        set_={
+            'payload': statement.excluded.payload,
+            'stored_at': statement.excluded.stored_at,
+            'expires_at': statement.excluded.expires_at,
+        }
+    )
+    db.session.execute(statement, list(latest.values()))
+
+
+case_cache = ResultCache('case', case_ttl)
+cause_list_cache = ResultCache('causelist', lambda result: CAUSE_LIST_TTL)
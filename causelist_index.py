@@ -0,0 +1,179 @@
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import as_completed
+
+from cache import cause_list_cache, cause_list_key
+from http_pool import submit
+from limits import CircuitOpenError
+from models import db
+from scraper import HIGH_COURTS, DISTRICT_COURTS, fetch_cause_list_async
+
+# Number of dates kept in memory, oldest build is dropped first
+INDEX_MAX_DATES = int(os.environ.get('INDEX_MAX_DATES', '7'))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {'adv', 'vs', 'v', 'of', 'the', 'and', 'hon', 'ble'}
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of a name, without titles and joining words"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class DateIndex:
+    """
+    Inverted index over all cause lists of one date
+
+    Every listed case is a posting. Advocate and party name tokens map to
+    the set of postings containing them, and case numbers map directly to
+    postings, so lookups are set intersections rather than scans.
+    """
+
+    def __init__(self, date):
+        self.date = date
+        self.postings = []
+        self.advocates = defaultdict(set)
+        self.parties = defaultdict(set)
+        self.case_numbers = defaultdict(set)
+        self.courts = {}
+        self.built_at = None
+
+    def add(self, court_type, header, entry):
+        posting = len(self.postings)
+        self.postings.append({
+            'court_type': court_type,
+            'court': header['court'],
+            'judge': header.get('judge'),
+            'court_hall': header.get('court_hall'),
+            **entry,
+        })
+        for token in tokenize(entry['advocate']):
+            self.advocates[token].add(posting)
+        for token in tokenize(entry['parties']):
+            self.parties[token].add(posting)
+        self.case_numbers[entry['case_number']].add(posting)
+
+    def search(self, advocate=None, party=None, case_number=None, limit=500):
+        """Postings matching every given criterion, all tokens of a name must match"""
+        candidates = None
+        criteria = []
+        if advocate:
+            criteria += [self.advocates.get(token, set()) for token in tokenize(advocate)]
+        if party:
+            criteria += [self.parties.get(token, set()) for token in tokenize(party)]
+        if case_number:
+            criteria.append(self.case_numbers.get(str(case_number).strip(), set()))
+
+        # Intersect the rarest postings first
+        for postings in sorted(criteria, key=len):
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                break
+        return [self.postings[i] for i in sorted(candidates or ())][:limit]
+
+    def stats(self):
+        return {
+            'date': self.date,
+            'courts': self.courts,
+            'entries': len(self.postings),
+            'built_at': self.built_at,
+        }
+
+
+class CauseListIndex:
+    """
+    Per-date indexes built in the background and kept in memory
+
+    Builds read cause lists through cause_list_cache, so lists that are
+    already cached, for example by the prefetcher or another worker, are
+    not fetched again, and fetched ones are cached for everyone.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._indexes = {}
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def get(self, date):
+        return self._indexes.get(date)
+
+    def is_building(self, date):
+        return date in self._building
+
+    def build_async(self, date):
+        """Start building the index for date unless a build is already running"""
+        with self._lock:
+            if date in self._building:
+                return False
+            thread = threading.Thread(target=self.build, args=(date,), name=f'causelist-index-{date}', daemon=True)
+            self._building[date] = thread
+        thread.start()
+        return True
+
+    def build(self, date):
+        """
+        Index every configured court's cause list for date
+
+        Lists missing from the cache are fetched in parallel and cached.
+
+        Returns:
+            DateIndex: The new index, which replaces any previous one for date
+        """
+        try:
+            with self.app.app_context():
+                try:
+                    cause_lists = self._cause_lists(date)
+                finally:
+                    db.session.remove()
+
+            index = DateIndex(date)
+            for (court_type, name), cause_list in cause_lists.items():
+                label = f'{court_type}:{name}'
+                if 'error' in cause_list:
+                    index.courts[label] = {'error': cause_list['error']}
+                    continue
+                for entry in cause_list['cases']:
+                    index.add(court_type, cause_list, entry)
+                index.courts[label] = {'entries': len(cause_list['cases'])}
+
+            index.built_at = time.time()
+            with self._lock:
+                self._indexes[date] = index
+                while len(self._indexes) > INDEX_MAX_DATES:
+                    oldest = min(self._indexes.values(), key=lambda i: i.built_at)
+                    del self._indexes[oldest.date]
+            return index
+        finally:
+            with self._lock:
+                self._building.pop(date, None)
+
+    def _cause_lists(self, date):
+        """Cause list of every court for date, keyed by (court_type, court_name)"""
+        courts = [('high', name) for name in HIGH_COURTS] + [('district', name) for name in DISTRICT_COURTS]
+        cause_lists, futures = {}, {}
+        for court_type, name in courts:
+            cached = cause_list_cache.get(cause_list_key(court_type, name, date))
+            if cached is not None:
+                cause_lists[court_type, name] = cached
+            else:
+                futures[submit(fetch_cause_list_async(court_type, name, date))] = (court_type, name)
+
+        for future in as_completed(futures):
+            court_type, name = futures[future]
+            try:
+                result = future.result()
+            except CircuitOpenError as e:
+                result = e.to_result()
+            cause_list_cache.put(cause_list_key(court_type, name, date), result)
+            cause_lists[court_type, name] = result
+        return cause_lists
+
+
+causelist_index = CauseListIndex()
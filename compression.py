@@ -0,0 +1,53 @@
+"""
+Response compression
+
+Large text responses are compressed with brotli when the client accepts
+it and the brotli package is installed, otherwise with gzip. Streamed
+and file responses are left alone, so NDJSON streams still reach the
+client line by line and documents keep their Range support.
+"""
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))  # bytes
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', '6'))  # gzip level, brotli quality is scaled from it
+COMPRESSIBLE_TYPES = {'application/json', 'text/html', 'text/css', 'text/plain', 'application/javascript',
+                      'text/javascript'}
+
+
+def choose_encoding(accept_encoding):
+    """Best encoding the client accepts, or None"""
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, request):
+    """Compress a response in place when it is worth it, for use in after_request"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    data = response.get_data()
+    if encoding is None or len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    if encoding == 'br':
+        data = brotli.compress(data, quality=min(11, COMPRESS_LEVEL + 1))
+    else:
+        data = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,167 @@
+"""
+Court and case type tables and the structured case ID
+
+Lookups in both directions are precomputed at import time, so turning a
+court name into its code, a code back into a name, or a case ID string
+into its parts never scans a table.
+"""
+from collections import namedtuple
+
+# Dictionary mapping court names to their codes
+HIGH_COURTS = {
+    "Allahabad": "1",
+    "Bombay": "2",
+    "Delhi": "3",
+    "Madras": "4",
+    "Karnataka": "5",
+    "Madhya Pradesh": "6",
+    "Gujarat": "7",
+    "Calcutta": "8",
+    "Patna": "9",
+    "Rajasthan": "10",
+    "Kerala": "11",
+    "Punjab and Haryana": "12",
+    "Telangana": "13",
+    "Andhra Pradesh": "14",
+    "Orissa": "15",
+    "Jharkhand": "16",
+    "Chhattisgarh": "17",
+    "Uttarakhand": "18",
+    "Himachal Pradesh": "19",
+    "Jammu and Kashmir": "20",
+    "Sikkim": "21",
+    "Manipur": "22",
+    "Meghalaya": "23",
+    "Tripura": "24",
+    "Guwahati": "25"
+}
+
+DISTRICT_COURTS = {
+    "Delhi": "1",
+    "Mumbai": "2",
+    "Chennai": "3",
+    "Bangalore": "4",
+    "Hyderabad": "5",
+    "Ahmedabad": "6",
+    "Kolkata": "7",
+    "Pune": "8",
+    "Jaipur": "9",
+    "Lucknow": "10",
+    "Chandigarh": "11",
+    "Bhopal": "12",
+    "Patna": "13",
+    "Guwahati": "14",
+    "Kochi": "15"
+}
+
+# Common case types
+CASE_TYPES = {
+    "CRL.A": "Criminal Appeal",
+    "CWP": "Civil Writ Petition",
+    "CRM": "Criminal Miscellaneous",
+    "WP": "Writ Petition",
+    "CS": "Civil Suit",
+    "SA": "Second Appeal",
+    "CRA": "Criminal Revision Application",
+    "CRLA": "Criminal Appeal",
+    "MACA": "Motor Accident Claims Appeal",
+    "FAO": "First Appeal from Order"
+}
+
+COURTS = {'high': HIGH_COURTS, 'district': DISTRICT_COURTS}
+
+# Case type abbreviations in table order
+CASE_TYPE_CODES = tuple(CASE_TYPES)
+
+# Case IDs are the court type prefix and the court code padded to
+# CODE_WIDTH digits, then the case number and the four digit year, each
+# after a separator: HC03-1234-2019. IDs issued before the separator, with
+# the code padded (HC0312342019) or not (HC312342019), still decode when
+# only one court code fits.
+CODE_WIDTH = 2
+SEPARATOR = '-'
+ID_PREFIXES = {'high': 'HC', 'district': 'DC'}
+_COURT_TYPES = {prefix: court_type for court_type, prefix in ID_PREFIXES.items()}
+_ID_CODES = {
+    court_type: {name: code.zfill(CODE_WIDTH) for name, code in courts.items()}
+    for court_type, courts in COURTS.items()
+}
+_NAMES_BY_ID_CODE = {
+    court_type: {code: name for name, code in codes.items()}
+    for court_type, codes in _ID_CODES.items()
+}
+# Every code spelling found in IDs without a separator, padded and unpadded
+_NAMES_BY_LEGACY_CODE = {
+    court_type: dict(
+        [(code, name) for name, code in courts.items()] +
+        [(code.zfill(CODE_WIDTH), name) for name, code in courts.items()]
+    )
+    for court_type, courts in COURTS.items()
+}
+
+
+def court_code(court_type, court_name):
+    """Return the court's code, or None if the court is not supported"""
+    courts = COURTS.get(court_type)
+    return courts.get(court_name) if courts else None
+
+
+class CaseId(namedtuple('CaseId', ['court_type', 'court_name', 'case_number', 'year'])):
+    """
+    Structured case ID
+
+    str() encodes it, e.g. CaseId('high', 'Delhi', '1234', '2019') is
+    'HC03-1234-2019', and CaseId.decode() parses such a string back.
+    """
+
+    __slots__ = ()
+
+    def encode(self):
+        code = _ID_CODES[self.court_type][self.court_name]
+        return SEPARATOR.join([f"{ID_PREFIXES[self.court_type]}{code}", self.case_number, self.year])
+
+    __str__ = encode
+
+    @classmethod
+    def decode(cls, case_id):
+        """
+        Parse a case ID string
+
+        IDs without separators are decoded only when exactly one court
+        code fits. HC1222022 could be case 22 of court 1 or case 2 of
+        court 12, and is rejected rather than guessed.
+
+        Args:
+            case_id (str): Case ID as returned in case details
+
+        Returns:
+            CaseId: The decoded ID
+
+        Raises:
+            ValueError: If the string is not a case ID of a supported
+                court, or an ambiguous ID from before the separator
+        """
+        if not isinstance(case_id, str):
+            raise ValueError(f"Invalid case ID {case_id!r}")
+        court_type = _COURT_TYPES.get(case_id[:2])
+        if court_type is None:
+            raise ValueError(f"Invalid case ID '{case_id}'")
+
+        if SEPARATOR in case_id:
+            court, _, rest = case_id.partition(SEPARATOR)
+            case_number, _, year = rest.rpartition(SEPARATOR)
+            candidates = [(_NAMES_BY_ID_CODE[court_type].get(court[2:]), case_number)]
+        else:
+            body, year = case_id[2:-4], case_id[-4:]
+            candidates = {
+                (name, body[len(code):])
+                for code, name in _NAMES_BY_LEGACY_CODE[court_type].items()
+                if body.startswith(code)
+            }
+            if len(candidates) > 1:
+                raise ValueError(f"Ambiguous case ID '{case_id}', the court code cannot be told from the case number")
+
+        (court_name, case_number), = candidates or [(None, None)]
+        if court_name is None or not case_number or len(year) != 4 or not year.isdigit():
+            raise ValueError(f"Invalid case ID '{case_id}'")
+        return cls(court_type, court_name, case_number, year)
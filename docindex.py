@@ -0,0 +1,302 @@
+"""
+Full-text index of stored documents
+
+Every blob in the document store gets its text extracted and added to a
+SQLite FTS5 table, document_fts, by a small pool of background threads.
+Extraction happens off the request and download paths: a put only wakes
+the pool, and blobs stored before the index existed are picked up the
+same way. The document_text table tracks which blobs are indexed and
+maps each to its rowid in document_fts.
+
+Text of real PDFs is extracted with pypdf, pinned in requirements.txt.
+Without it PDFs are recorded as failed. Other documents are indexed as
+UTF-8 text.
+"""
+import html
+import io
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+import docstore
+import metrics
+from models import db, DocumentBlob, DocumentRef, DocumentText
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - optional dependency
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+# Index settings
+DOCINDEX_WORKERS = int(os.environ.get('DOCINDEX_WORKERS', '2'))
+DOCINDEX_POLL_INTERVAL = float(os.environ.get('DOCINDEX_POLL_INTERVAL', '30'))  # seconds between checks for missed blobs
+DOCINDEX_STALE_AFTER = int(os.environ.get('DOCINDEX_STALE_AFTER', '300'))  # seconds a blob may stay claimed
+MAX_SEARCH_RESULTS = 100
+SNIPPET_TOKENS = 16
+
+# Highlight markers FTS5 puts around matches, swapped for <mark> once the snippet is escaped
+_MATCH_START, _MATCH_END = '\x02', '\x03'
+_TERM = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def fts_available():
+    """FTS5 is a SQLite feature, other databases get no document search"""
+    return db.engine.dialect.name == 'sqlite'
+
+
+def create_index():
+    """Create the document_fts table if it is missing"""
+    db.session.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS document_fts "
+        "USING fts5(body, tokenize='porter unicode61 remove_diacritics 2')"
+    ))
+    db.session.commit()
+
+
+def extract_text(data):
+    """
+    Text content of a document
+
+    Raises:
+        ValueError: For a PDF when pypdf is not installed
+    """
+    if data.startswith(b'%PDF'):
+        if PdfReader is None:
+            raise ValueError('pypdf is needed to extract text from PDF files')
+        return '\n'.join(page.extract_text() or '' for page in PdfReader(io.BytesIO(data)).pages)
+    return data.decode('utf-8', errors='replace')
+
+
+def match_expression(query):
+    """
+    FTS5 MATCH expression for a user query
+
+    Words are matched as terms that must all occur, "quoted words" as a
+    phrase and a trailing * as a prefix. Everything is quoted, so FTS5
+    operators and punctuation in the query are never a syntax error.
+
+    Returns:
+        str: The expression, empty when the query has no terms
+    """
+    terms = []
+    for phrase, word in _TERM.findall(query):
+        term = phrase or word
+        prefix = not phrase and term.endswith('*')
+        term = term.rstrip('*') if prefix else term
+        if term.strip():
+            terms.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+def _highlight(snippet):
+    escaped = html.escape(snippet or '')
+    return escaped.replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+
+
+def search(query, case_id=None, document_type=None, limit=20):
+    """
+    Search indexed documents, best match first
+
+    Args:
+        query (str): Words, "phrases" and prefix* terms, all must match
+        case_id (str): Only documents of this case
+        document_type (str): Only judgments or orders
+        limit (int): Maximum number of results
+
+    Returns:
+        list: Dicts with the blob's sha256, a bm25 score where higher is
+        better, an HTML snippet with matches in <mark>, the download_url
+        and the (case_id, document_type) pairs the document is stored for
+
+    Raises:
+        ValueError: For a query without terms
+    """
+    match = match_expression(query)
+    if not match:
+        raise ValueError('Empty search query')
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+
+    filters, params = [], {'match': match, 'limit': limit, 'tokens': SNIPPET_TOKENS}
+    if case_id:
+        filters.append("t.sha256 IN (SELECT sha256 FROM document_ref WHERE case_id = :case_id)")
+        params['case_id'] = case_id
+    if document_type:
+        filters.append("t.sha256 IN (SELECT sha256 FROM document_ref WHERE document_type = :document_type)")
+        params['document_type'] = document_type
+    rows = db.session.execute(text(
+        "SELECT t.sha256, bm25(document_fts) AS rank, "
+        "snippet(document_fts, 0, char(2), char(3), '…', :tokens) AS snippet "
+        "FROM document_fts JOIN document_text t ON t.id = document_fts.rowid "
+        "WHERE document_fts MATCH :match " + ''.join(f"AND {clause} " for clause in filters) +
+        "ORDER BY rank LIMIT :limit"
+    ), params).all()
+
+    hashes = [row.sha256 for row in rows]
+    blobs = {blob.sha256: blob for blob in DocumentBlob.query.filter(DocumentBlob.sha256.in_(hashes))}
+    refs = {}
+    for ref in DocumentRef.query.filter(DocumentRef.sha256.in_(hashes)).order_by(DocumentRef.case_id):
+        refs.setdefault(ref.sha256, []).append({'case_id': ref.case_id, 'document_type': ref.document_type})
+    return [
+        {
+            'sha256': row.sha256,
+            'score': round(-row.rank, 4),
+            'snippet': _highlight(row.snippet),
+            'download_url': f'/downloads/{blobs[row.sha256].path}',
+            'documents': refs.get(row.sha256, []),
+        }
+        for row in rows if row.sha256 in blobs
+    ]
+
+
+def remove(sha256):
+    """Drop a blob from the index, docstore eviction listener"""
+    entry = DocumentText.query.filter_by(sha256=sha256).first()
+    if entry is None:
+        return
+    if fts_available():
+        db.session.execute(text("DELETE FROM document_fts WHERE rowid = :id"), {'id': entry.id})
+    db.session.delete(entry)
+
+
+class DocumentIndexer:
+    """
+    Threads that extract and index blobs missing from document_text
+
+    A blob is claimed by inserting its document_text row, whose unique
+    hash lets one thread of one process win, and indexed in the same
+    way whether it was just stored or has been in the store for years.
+    Claims left behind by a thread that died are released every
+    DOCINDEX_STALE_AFTER seconds.
+    """
+
+    def __init__(self, workers=DOCINDEX_WORKERS):
+        self.workers = workers
+        self.app = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next_release = 0
+
+    def init_app(self, app):
+        if self.app is None:
+            docstore.add_listener('put', lambda sha256: self.notify())
+            docstore.add_listener('evict', remove)
+        self.app = app
+
+    def start(self):
+        """Create the index and start the indexing threads once per process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            with self.app.app_context():
+                if not fts_available():
+                    logger.info("Document search needs SQLite FTS5, not indexing documents")
+                    return
+                create_index()
+                self._release_stale()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'docindex-{i}', daemon=True)
+                thread.start()
+
+    def notify(self):
+        """Wake idle threads because a document was stored"""
+        self._wakeup.set()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                entry = None
+                try:
+                    entry = self._claim()
+                    if entry is not None:
+                        self._process(entry)
+                except Exception:
+                    logger.exception("Document indexing failed")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                if entry is None:
+                    self._wakeup.wait(DOCINDEX_POLL_INTERVAL)
+                    self._wakeup.clear()
+
+    def _claim(self):
+        if time.monotonic() >= self._next_release:
+            self._next_release = time.monotonic() + DOCINDEX_STALE_AFTER
+            self._release_stale()
+        pending = (
+            db.session.query(DocumentBlob.sha256)
+            .outerjoin(DocumentText, DocumentText.sha256 == DocumentBlob.sha256)
+            .filter(DocumentText.id.is_(None))
+            .order_by(DocumentBlob.stored_at.desc())
+            .limit(self.workers)
+            .all()
+        )
+        for (sha256,) in pending:
+            entry = DocumentText(sha256=sha256, status='indexing', updated_at=datetime.utcnow())
+            db.session.add(entry)
+            try:
+                db.session.commit()
+                return entry
+            except IntegrityError:
+                db.session.rollback()
+        return None
+
+    def _process(self, entry):
+        blob = DocumentBlob.query.get(entry.sha256)
+        try:
+            if blob is None:
+                raise FileNotFoundError(f'Blob {entry.sha256} was evicted')
+            with open(os.path.join(docstore.DOCSTORE_DIR, blob.path), 'rb') as f:
+                data = f.read()
+            with metrics.timed('extract'):
+                body = extract_text(data)
+        except Exception as e:
+            # pypdf raises its own errors for corrupt PDFs, record any failure instead of keeping the claim
+            metrics.error(e, 'docindex')
+            entry.status = 'failed'
+            entry.error = str(e)
+        else:
+            with metrics.timed('index'):
+                db.session.execute(
+                    text("INSERT INTO document_fts (rowid, body) VALUES (:id, :body)"),
+                    {'id': entry.id, 'body': body},
+                )
+            entry.status = 'indexed'
+            entry.chars = len(body)
+            entry.error = None
+        entry.updated_at = datetime.utcnow()
+        db.session.commit()
+
+    def _release_stale(self):
+        """Forget claims left behind by a thread that died, so the blobs are indexed again"""
+        cutoff = datetime.utcnow() - timedelta(seconds=DOCINDEX_STALE_AFTER)
+        (
+            DocumentText.query
+            .filter(DocumentText.status == 'indexing', DocumentText.updated_at < cutoff)
+            .delete(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def status(self):
+        """Counts of indexed, failed and pending documents"""
+        counts = dict(db.session.query(DocumentText.status, db.func.count()).group_by(DocumentText.status).all())
+        total = DocumentBlob.query.count()
+        indexed, failed = counts.get('indexed', 0), counts.get('failed', 0)
+        return {
+            'available': fts_available(),
+            'indexed': indexed,
+            'failed': failed,
+            'pending': max(0, total - indexed - failed),
+        }
+
+
+document_index = DocumentIndexer()
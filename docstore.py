@@ -0,0 +1,169 @@
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+import metrics
+from models import db, DocumentBlob, DocumentRef
+
+# Document store settings
+DOCSTORE_DIR = os.environ.get(
+    'DOCSTORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'downloads')
+)
+DOCSTORE_MAX_BYTES = int(os.environ.get('DOCSTORE_MAX_BYTES', '0'))  # 0 disables size eviction
+DOCSTORE_MAX_AGE = int(os.environ.get('DOCSTORE_MAX_AGE', '0'))  # seconds since last access, 0 disables
+ACCESS_RESOLUTION = timedelta(minutes=5)  # how stale last_accessed may get before it is rewritten
+
+# Callbacks taking a blob hash, run after a put commits and before an eviction commits
+_listeners = {'put': [], 'evict': []}
+
+
+def add_listener(event, callback):
+    """
+    Call callback(sha256) whenever a document is stored or evicted
+
+    Args:
+        event (str): 'put' or 'evict'
+        callback: Function of the blob hash. Put callbacks run after the
+            commit and should return quickly, evict callbacks run inside
+            the evicting transaction.
+    """
+    _listeners[event].append(callback)
+
+
+def blob_path(sha256):
+    """Relative path of a blob, fanned out by the first two hex digits"""
+    return os.path.join('blobs', sha256[:2], f'{sha256}.pdf')
+
+
+def put(case_id, document_type, data):
+    """
+    Store a document and point (case_id, document_type) at it
+
+    Identical content is written once no matter how many cases or
+    downloads refer to it.
+
+    Args:
+        case_id (str): Case ID
+        document_type (str): 'judgment' or 'order'
+        data (bytes): Document content
+
+    Returns:
+        str: Path of the blob relative to the downloads directory
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    now = datetime.utcnow()
+
+    blob = DocumentBlob.query.get(sha256)
+    if blob is None or not os.path.exists(os.path.join(DOCSTORE_DIR, blob.path)):
+        path = blob_path(sha256)
+        with metrics.timed('file_write'):
+            _write_atomic(os.path.join(DOCSTORE_DIR, path), data)
+        if blob is None:
+            blob = DocumentBlob(sha256=sha256, size=len(data), path=path)
+            db.session.add(blob)
+    blob.last_accessed = now
+
+    ref = DocumentRef.query.filter_by(case_id=case_id, document_type=document_type).first()
+    if ref is None:
+        ref = DocumentRef(case_id=case_id, document_type=document_type)
+        db.session.add(ref)
+    ref.sha256 = sha256
+    ref.updated_at = now
+    with metrics.timed('db_commit'):
+        db.session.commit()
+    for callback in _listeners['put']:
+        callback(sha256)
+
+    if DOCSTORE_MAX_BYTES or DOCSTORE_MAX_AGE:
+        evict(DOCSTORE_MAX_BYTES, DOCSTORE_MAX_AGE, keep=sha256)
+    return blob.path
+
+
+def lookup(path):
+    """Return the DocumentBlob stored at a relative path, or None"""
+    # Blob paths are derived from the hash, so the primary key is read off the path
+    sha256, extension = os.path.splitext(os.path.basename(path))
+    if extension != '.pdf' or blob_path(sha256) != path:
+        return None
+    blob = DocumentBlob.query.get(sha256)
+    return blob if blob is not None and blob.path == path else None
+
+
+def exists(path):
+    """Whether a relative path still refers to a stored file"""
+    return bool(path) and os.path.exists(os.path.join(DOCSTORE_DIR, path))
+
+
+def touch(blob):
+    """Record an access for LRU eviction, rewriting the row at most every few minutes"""
+    now = datetime.utcnow()
+    if blob.last_accessed is None or now - blob.last_accessed > ACCESS_RESOLUTION:
+        blob.last_accessed = now
+        db.session.commit()
+
+
+def evict(max_bytes=0, max_age=0, keep=None):
+    """
+    Delete blobs not accessed for max_age seconds, then least recently
+    accessed blobs until the store is at most max_bytes
+
+    Args:
+        max_bytes (int): Size budget in bytes, 0 for no limit
+        max_age (int): Maximum seconds since last access, 0 for no limit
+        keep (str): Hash of a blob that must not be evicted
+
+    Returns:
+        int: Number of blobs removed
+    """
+    victims = []
+    if max_age:
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+        victims.extend(DocumentBlob.query.filter(DocumentBlob.last_accessed < cutoff).all())
+
+    if max_bytes:
+        total = db.session.query(func.coalesce(func.sum(DocumentBlob.size), 0)).scalar()
+        total -= sum(blob.size for blob in victims)
+        if total > max_bytes:
+            for blob in DocumentBlob.query.order_by(DocumentBlob.last_accessed).yield_per(100):
+                if total <= max_bytes:
+                    break
+                if blob in victims:
+                    continue
+                victims.append(blob)
+                total -= blob.size
+
+    paths = []
+    for blob in victims:
+        if blob.sha256 == keep:
+            continue
+        DocumentRef.query.filter_by(sha256=blob.sha256).delete(synchronize_session=False)
+        for callback in _listeners['evict']:
+            callback(blob.sha256)
+        db.session.delete(blob)
+        paths.append(blob.path)
+    # Files go only once the rows are gone, so a failed commit never leaves a
+    # row without its file. A file that is already missing counts as evicted.
+    db.session.commit()
+    for path in paths:
+        try:
+            os.remove(os.path.join(DOCSTORE_DIR, path))
+        except FileNotFoundError:
+            pass
+    return len(paths)
+
+
+def _write_atomic(path, data):
+    """Write to a temporary file and rename it so readers never see a partial blob"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,74 @@
+"""
+Production serving with gunicorn
+
+    gunicorn -c gunicorn.conf.py
+
+The app is created once in the master (preload_app), which creates the
+schema and warms the caches, and the workers are forked from it already
+warm. Every worker runs its own background threads, scraper loop and
+in-process cache tier, and shares the persistent cache and everything
+else through the database.
+
+Rate limiters and concurrency slots are per process too, so each worker
+gets an equal share of COURT_RATE, COURT_BURST and
+MAX_CONCURRENCY_PER_COURT.
+"""
+import gc
+import multiprocessing
+import os
+import shutil
+
+wsgi_app = 'app:create_app()'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# Request threads mostly wait on the shared scraper loop, so each worker runs several
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # off by default, requests are measured in /metrics
+
+# Aggregate /metrics across workers. The directory must be empty at startup
+# and be set before prometheus_client is imported by the app.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               '.prometheus'))
+
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def pre_fork(server, worker):
+    # Objects created by the warmup stay in pages shared with the master
+    # instead of being copied into every worker by the garbage collector
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Split the per-court upstream budgets so the workers together stay within them
+    import http_pool
+    import limits
+    limits.share_between(server.cfg.workers)
+    http_pool.share_between(server.cfg.workers)
+    # Threads do not survive fork, start this worker's own instead of
+    # waiting for its first request
+    from app import start_background_workers
+    start_background_workers()
+
+
+def worker_exit(server, worker):
+    # Write out buffered audit records and cache entries before the worker goes
+    from batch_writer import batch_writer
+    try:
+        batch_writer.flush()
+    except Exception:
+        server.log.exception('Final batch writer flush failed')
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
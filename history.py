@@ -0,0 +1,177 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from models import db, CaseQuery, CaseDocument, CourtCase, Hearing, Party
+
+MAX_PAGE_SIZE = 500
+
+
+def store_case(query, result):
+    """
+    Upsert the normalized case, parties, documents and hearings for a
+    successful fetch_case_details result. The caller commits.
+
+    Args:
+        query (dict): court_type, court_name, case_type, case_number and year of the lookup
+        result (dict): Case details returned by the scraper
+    """
+    case = CourtCase.query.filter_by(**query).first()
+    if case is None:
+        case = CourtCase(**query)
+        db.session.add(case)
+
+    case.portal_case_id = result.get('case_id')
+    case.status = result.get('status')
+    case.filing_date = result.get('filing_date')
+    case.next_hearing_date = result.get('next_hearing_date')
+    case.updated_at = datetime.utcnow()
+
+    parties = result.get('parties', {})
+    current = {(p.role, p.name) for p in case.parties}
+    wanted = {(role, name) for role, name in parties.items() if name}
+    if current != wanted:
+        case.parties = [Party(role=role, name=name, name_key=name.lower()) for role, name in sorted(wanted)]
+
+    known = {d.document_id for d in case.documents}
+    for doc in result.get('documents', []):
+        if doc.get('id') and doc['id'] not in known:
+            case.documents.append(CaseDocument(document_id=doc['id'], document_type=doc.get('type'), date=doc.get('date')))
+            known.add(doc['id'])
+
+    hearing_date = result.get('next_hearing_date')
+    if hearing_date and hearing_date not in {h.hearing_date for h in case.hearings}:
+        case.hearings.append(Hearing(hearing_date=hearing_date))
+    return case
+
+
+def query_row(query, result, query_date=None):
+    """Column values of the CaseQuery audit row for a lookup and its result"""
+    row = dict(query, query_date=query_date or datetime.now())
+    if 'error' in result:
+        row['status'] = 'error'
+        row['response'] = json.dumps({'error': result['error']})
+    else:
+        row['status'] = 'success'
+        row['response'] = json.dumps(result)
+    return row
+
+
+def write_query_batch(items):
+    """
+    Write a batch of audit records, BatchWriter handler for 'query' items
+
+    Each item is a dict with the query, its result, the query_date and
+    whether the result is fresh and should update the normalized tables.
+    """
+    db.session.execute(
+        CaseQuery.__table__.insert(),
+        [query_row(item['query'], item['result'], item['query_date']) for item in items]
+    )
+
+    # Only the newest result of a case matters for the normalized tables
+    fresh = {}
+    for item in items:
+        if item['normalize'] and 'error' not in item['result']:
+            fresh[tuple(sorted(item['query'].items()))] = item
+    for item in fresh.values():
+        store_case(item['query'], item['result'])
+
+
+def write_case_batch(items):
+    """
+    Update the normalized tables without an audit record, BatchWriter
+    handler for 'case' items holding a query and its successful result
+    """
+    latest = {tuple(sorted(item['query'].items())): item for item in items}
+    for item in latest.values():
+        store_case(item['query'], item['result'])
+
+
+def encode_cursor(*values):
+    raw = '|'.join(str(v) for v in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor, raises ValueError for a malformed cursor"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        return base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def query_history(filters, since=None, until=None, cursor=None, limit=100):
+    """
+    Keyset-paginated query history, newest first
+
+    Pages are located with a (query_date, id) cursor rather than an
+    OFFSET, so every page costs the same however deep the client reads.
+
+    Args:
+        filters (dict): Equality filters on CaseQuery columns
+        since (datetime): Only queries at or after this time
+        until (datetime): Only queries before this time
+        cursor (str): next_cursor from the previous page
+        limit (int): Page size
+
+    Returns:
+        tuple: (list of CaseQuery, next_cursor or None)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    q = CaseQuery.query.filter_by(**filters)
+    if since is not None:
+        q = q.filter(CaseQuery.query_date >= since)
+    if until is not None:
+        q = q.filter(CaseQuery.query_date < until)
+    if cursor:
+        date_value, id_value = decode_cursor(cursor)
+        last_date, last_id = datetime.fromisoformat(date_value), int(id_value)
+        q = q.filter(or_(
+            CaseQuery.query_date < last_date,
+            and_(CaseQuery.query_date == last_date, CaseQuery.id < last_id)
+        ))
+
+    rows = q.order_by(CaseQuery.query_date.desc(), CaseQuery.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].query_date.isoformat(), rows[-1].id)
+    return rows, next_cursor
+
+
+def search_cases(filters, party=None, cursor=None, limit=100):
+    """
+    Keyset-paginated search over normalized cases, newest id first
+
+    Args:
+        filters (dict): Equality filters on CourtCase columns
+        party (str): Prefix of a petitioner or respondent name, case-insensitive
+        cursor (str): next_cursor from the previous page
+        limit (int): Page size
+
+    Returns:
+        tuple: (list of CourtCase, next_cursor or None)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    q = CourtCase.query.filter_by(**filters)
+    if party:
+        # Range scan on the name_key index instead of a leading-wildcard LIKE
+        prefix = party.strip().lower()
+        matching = db.session.query(Party.case_id).filter(
+            Party.name_key >= prefix, Party.name_key < prefix + '\uffff'
+        )
+        q = q.filter(CourtCase.id.in_(matching))
+    if cursor:
+        (last_id,) = decode_cursor(cursor)
+        q = q.filter(CourtCase.id < int(last_id))
+
+    rows = q.order_by(CourtCase.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
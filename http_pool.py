@@ -0,0 +1,128 @@
+import asyncio
+import atexit
+import os
+import threading
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import profiling
+
+# Pool and concurrency settings for upstream court portals
+POOL_SIZE_PER_HOST = int(os.environ.get('POOL_SIZE_PER_HOST', '16'))
+MAX_CONCURRENCY_PER_COURT = int(os.environ.get('MAX_CONCURRENCY_PER_COURT', '4'))
+UPSTREAM_TIMEOUT = float(os.environ.get('UPSTREAM_TIMEOUT', '30'))
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+# Keep-alive sessions keyed by host, and concurrency slots keyed by court
+_sessions = {}
+_court_slots = {}
+# Processes sharing MAX_CONCURRENCY_PER_COURT, each with its own slots
+_processes = 1
+
+
+def get_loop():
+    """
+    Return the shared scraper event loop, starting it on first use
+
+    The loop runs in a daemon thread so that synchronous callers (Flask
+    request threads, background workers) can all submit coroutines to it
+    and share the same connection pools.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        # Threads do not survive a fork, so each worker process gets its own loop
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            # Tasks started by a profiled request are profiled with it
+            _loop.set_task_factory(profiling.task_factory)
+            _loop_pid = os.getpid()
+            _sessions.clear()
+            _court_slots.clear()
+            thread = threading.Thread(target=_loop.run_forever, name='scraper-loop', daemon=True)
+            thread.start()
+    return _loop
+
+
+def submit(coro):
+    """Schedule a coroutine on the scraper loop and return a concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(profiling.wrap(coro), get_loop())
+
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the scraper loop and block until it finishes"""
+    future = submit(coro)
+    with profiling.paused():
+        return future.result(timeout)
+
+
+def get_session(base_url, headers=None):
+    """
+    Return the pooled HTTP session for the host of base_url
+
+    Must be called from the scraper loop. Sessions keep connections alive
+    between requests, so repeat lookups against the same portal skip the
+    TCP and TLS handshakes.
+    """
+    host = urlsplit(base_url).netloc
+    session = _sessions.get(host)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit_per_host=POOL_SIZE_PER_HOST,
+            keepalive_timeout=60,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=UPSTREAM_TIMEOUT),
+        )
+        _sessions[host] = session
+    return session
+
+
+def share_between(processes):
+    """
+    Give this process its share of every court's concurrency budget
+
+    Slots live in each process, so every gunicorn worker calls this with
+    the worker count to keep the workers together within
+    MAX_CONCURRENCY_PER_COURT. A process always keeps at least one slot.
+    """
+    global _processes
+    _processes = max(1, processes)
+    _court_slots.clear()
+
+
+@asynccontextmanager
+async def court_slot(court_key):
+    """Bound the number of in-flight upstream calls for a single court"""
+    slot = _court_slots.get(court_key)
+    if slot is None:
+        slot = _court_slots[court_key] = asyncio.Semaphore(max(1, MAX_CONCURRENCY_PER_COURT // _processes))
+    async with slot:
+        yield
+
+
+async def _close_sessions():
+    for session in list(_sessions.values()):
+        await session.close()
+    _sessions.clear()
+
+
+@atexit.register
+def shutdown():
+    """Close pooled sessions and stop the scraper loop"""
+    global _loop
+    if _loop is None or _loop_pid != os.getpid():
+        return
+    try:
+        run_sync(_close_sessions(), timeout=5)
+    except Exception:
+        pass
+    _loop.call_soon_threadsafe(_loop.stop)
+    _loop = None
@@ -0,0 +1,203 @@
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+import docstore
+import metrics
+from models import db, DownloadJob
+from scraper import download_judgment
+
+# Download job settings
+DOWNLOAD_WORKERS = int(os.environ.get('DOWNLOAD_WORKERS', '4'))
+DOWNLOAD_MAX_ATTEMPTS = int(os.environ.get('DOWNLOAD_MAX_ATTEMPTS', '4'))
+DOWNLOAD_RETRY_DELAY = float(os.environ.get('DOWNLOAD_RETRY_DELAY', '2'))  # seconds, doubled per attempt
+DOWNLOAD_POLL_INTERVAL = float(os.environ.get('DOWNLOAD_POLL_INTERVAL', '1'))
+DOWNLOAD_STALE_AFTER = int(os.environ.get('DOWNLOAD_STALE_AFTER', '300'))  # seconds a job may stay running
+
+ACTIVE_STATUSES = ('queued', 'running', 'done')
+
+
+def enqueue_download(case_id, document_type):
+    """
+    Queue a document download, reusing an identical job if one exists
+
+    Concurrent requests for the same document are settled by the
+    uq_download_job_pending index: the first insert wins and the others
+    return its job.
+
+    Args:
+        case_id (str): Case ID
+        document_type (str): 'judgment' or 'order'
+
+    Returns:
+        tuple: (DownloadJob, created) where created is False for a deduplicated job
+    """
+    existing = (
+        DownloadJob.query
+        .filter(DownloadJob.case_id == case_id,
+                DownloadJob.document_type == document_type,
+                DownloadJob.status.in_(ACTIVE_STATUSES))
+        .order_by(DownloadJob.created_at.desc())
+        .first()
+    )
+    # A finished job whose document has since been evicted must run again
+    if existing is not None and (existing.status != 'done' or docstore.exists(existing.file_path)):
+        return existing, False
+
+    job = DownloadJob(id=uuid.uuid4().hex, case_id=case_id, document_type=document_type)
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request queued the same document since the lookup above
+        db.session.rollback()
+        return enqueue_download(case_id, document_type)
+    download_workers.notify()
+    return job, True
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = DOWNLOAD_RETRY_DELAY * (2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class DownloadWorkerPool:
+    """
+    Threads that claim queued DownloadJob rows and run them
+
+    Jobs are claimed with a conditional UPDATE so several worker threads,
+    or several processes sharing the database, never run the same job twice.
+    A job whose result cannot be saved is put back in the queue, and jobs
+    left running by a thread or process that died are requeued every
+    DOWNLOAD_STALE_AFTER seconds.
+    """
+
+    def __init__(self, workers=DOWNLOAD_WORKERS):
+        self.workers = workers
+        self.app = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next_requeue = 0
+
+    def init_app(self, app):
+        self.app = app
+
+    def start(self):
+        """Start the worker threads once per process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            with self.app.app_context():
+                self._requeue_stale()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'download-worker-{i}', daemon=True)
+                thread.start()
+
+    def notify(self):
+        """Wake idle workers because a job was queued"""
+        self._wakeup.set()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                job = None
+                try:
+                    job = self._claim()
+                    if job is not None:
+                        self._process(job)
+                except Exception:
+                    db.session.rollback()
+                    if job is not None:
+                        self._release(job)
+                finally:
+                    db.session.remove()
+                if job is None:
+                    self._wakeup.wait(DOWNLOAD_POLL_INTERVAL)
+                    self._wakeup.clear()
+
+    def _claim(self):
+        if time.monotonic() >= self._next_requeue:
+            self._next_requeue = time.monotonic() + DOWNLOAD_STALE_AFTER
+            self._requeue_stale()
+        now = datetime.utcnow()
+        candidates = (
+            DownloadJob.query
+            .filter(DownloadJob.status == 'queued', DownloadJob.next_attempt_at <= now)
+            .order_by(DownloadJob.next_attempt_at)
+            .limit(self.workers)
+            .all()
+        )
+        for candidate in candidates:
+            claimed = (
+                DownloadJob.query
+                .filter_by(id=candidate.id, status='queued')
+                .update({'status': 'running', 'updated_at': now}, synchronize_session=False)
+            )
+            db.session.commit()
+            if claimed:
+                return DownloadJob.query.get(candidate.id)
+        return None
+
+    def _process(self, job):
+        try:
+            result = download_judgment(job.case_id, job.document_type)
+        except Exception as e:
+            result = {'error': f'Failed to download document: {str(e)}'}
+
+        job.attempts = (job.attempts or 0) + 1
+        job.updated_at = datetime.utcnow()
+        if isinstance(result, dict) and 'error' in result:
+            job.error = result['error']
+            metrics.error('DownloadFailed', 'download_job')
+            if job.attempts >= DOWNLOAD_MAX_ATTEMPTS:
+                job.status = 'failed'
+            else:
+                job.status = 'queued'
+                job.next_attempt_at = job.updated_at + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = 'done'
+            job.file_path = result
+            job.error = None
+        db.session.commit()
+
+    def _release(self, job):
+        """Count a failed attempt for a job whose result could not be saved, instead of leaving it running"""
+        try:
+            attempts = (job.attempts or 0) + 1
+            now = datetime.utcnow()
+            (
+                DownloadJob.query
+                .filter_by(id=job.id, status='running')
+                .update({
+                    'status': 'failed' if attempts >= DOWNLOAD_MAX_ATTEMPTS else 'queued',
+                    'attempts': attempts,
+                    'error': 'Failed to save the download result',
+                    'updated_at': now,
+                    'next_attempt_at': now + timedelta(seconds=retry_delay(attempts)),
+                }, synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception:
+            # Still running in the database, _requeue_stale picks it up later
+            db.session.rollback()
+
+    def _requeue_stale(self):
+        """Requeue jobs left running by a worker that died"""
+        cutoff = datetime.utcnow() - timedelta(seconds=DOWNLOAD_STALE_AFTER)
+        (
+            DownloadJob.query
+            .filter(DownloadJob.status == 'running', DownloadJob.updated_at < cutoff)
+            .update({'status': 'queued'}, synchronize_session=False)
+        )
+        db.session.commit()
+
+
+download_workers = DownloadWorkerPool()
@@ -0,0 +1,171 @@
+import asyncio
+import os
+import time
+
+# Per-court upstream protection settings
+COURT_RATE = float(os.environ.get('COURT_RATE', '2'))  # requests per second
+COURT_BURST = float(os.environ.get('COURT_BURST', '5'))
+BREAKER_FAILURES = int(os.environ.get('BREAKER_FAILURES', '5'))  # consecutive failures before opening
+BREAKER_RESET = float(os.environ.get('BREAKER_RESET', '30'))  # seconds before a trial request
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a court whose circuit breaker is open"""
+
+    def __init__(self, court_key, retry_after):
+        super().__init__(f"Court '{court_key}' is temporarily unavailable, retry in {retry_after:.0f}s")
+        self.court_key = court_key
+        self.retry_after = retry_after
+
+    def to_result(self):
+        """Error result in the shape returned by the scraper functions"""
+        return {"error": str(self), "retry_after": round(self.retry_after, 1)}
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter
+
+    Tokens refill continuously at rate per second up to capacity. Callers
+    that find the bucket empty wait for the next token instead of failing.
+    """
+
+    def __init__(self, rate=COURT_RATE, capacity=COURT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.waiting = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token, returning how many seconds to wait before it may be used"""
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            self.waiting += 1
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self.waiting -= 1
+
+    def state(self):
+        # Read from other threads, so the refill is computed without being stored
+        tokens = min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return {
+            'rate': self.rate,
+            'capacity': self.capacity,
+            'tokens': round(tokens, 2),
+            'waiting': self.waiting,
+        }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream court
+
+    After max_failures consecutive failures the circuit opens and calls
+    fail fast. Once reset_timeout has passed a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, max_failures=BREAKER_FAILURES, reset_timeout=BREAKER_RESET):
+        self.max_failures = max_failures
+        self.reset_timeout = reset_timeout
+        self.status = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def retry_after(self):
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self):
+        """Whether a call may go upstream now"""
+        if self.status == 'closed':
+            return True
+        if self.status == 'open' and self.retry_after() == 0:
+            self.status = 'half_open'
+        if self.status == 'half_open' and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.status = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.status == 'half_open' or self.failures >= self.max_failures:
+            self.status = 'open'
+            self.opened_at = time.monotonic()
+
+    def state(self):
+        return {
+            'status': self.status,
+            'failures': self.failures,
+            'retry_after': round(self.retry_after(), 1) if self.status != 'closed' else 0,
+        }
+
+
+# Limiters and breakers keyed by court, created on first use. Only touched
+# from the scraper loop, apart from the read-only status snapshot.
+_limiters = {}
+_breakers = {}
+# Processes sharing COURT_RATE and COURT_BURST, each with its own limiters
+_processes = 1
+
+
+def share_between(processes):
+    """
+    Give this process its share of every court's rate budget
+
+    Limiters live in each process, so every gunicorn worker calls this
+    with the worker count to keep the workers together within COURT_RATE.
+    The burst is never split below one request.
+    """
+    global _processes
+    _processes = max(1, processes)
+    _limiters.clear()
+
+
+def limiter(court_key):
+    bucket = _limiters.get(court_key)
+    if bucket is None:
+        bucket = _limiters[court_key] = TokenBucket(COURT_RATE / _processes, max(1.0, COURT_BURST / _processes))
+    return bucket
+
+
+def breaker(court_key):
+    circuit = _breakers.get(court_key)
+    if circuit is None:
+        circuit = _breakers[court_key] = CircuitBreaker()
+    return circuit
+
+
+def status():
+    """Limiter and breaker state for every court seen so far, without changing any of it"""
+    limiters, breakers = dict(_limiters), dict(_breakers)
+    return {
+        key: {
+            'limiter': limiters[key].state() if key in limiters else None,
+            'breaker': breakers[key].state() if key in breakers else None,
+        }
+        for key in sorted(set(limiters) | set(breakers))
+    }
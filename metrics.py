@@ -0,0 +1,67 @@
+"""
+Prometheus metrics of the app, scraped from /metrics
+
+Under a multi-process server set PROMETHEUS_MULTIPROC_DIR to a shared,
+empty directory so /metrics aggregates the samples of every worker.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess, REGISTRY)
+
+REQUEST_LATENCY = Histogram(
+    'court_scraper_request_seconds', 'Time to produce a response, by endpoint',
+    ['method', 'endpoint', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+STAGE_LATENCY = Histogram(
+    'court_scraper_stage_seconds', 'Time spent in a processing stage',
+    ['stage'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+CACHE_LOOKUPS = Counter(
+    'court_scraper_cache_lookups_total', 'Result cache lookups by outcome',
+    ['cache', 'result'],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    'court_scraper_upstream_in_flight', 'Upstream calls currently running, by court',
+    ['court'], multiprocess_mode='livesum',
+)
+ERRORS = Counter(
+    'court_scraper_errors_total', 'Errors by type and where they happened',
+    ['type', 'where'],
+)
+
+
+@contextmanager
+def timed(stage):
+    """Observe the duration of the block as one sample of stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+def error(error_type, where):
+    """Count one error, error_type is an exception or a short name"""
+    if isinstance(error_type, BaseException):
+        error_type = type(error_type).__name__
+    ERRORS.labels(error_type, where).inc()
+
+
+def render():
+    """
+    Current metrics in the Prometheus text format
+
+    Returns:
+        tuple: (body, content_type)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,8 +1,23 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from datetime import datetime
+import json
+import sqlite3
 
 db = SQLAlchemy()
 
+
+@event.listens_for(Engine, 'connect')
+def _configure_sqlite(dbapi_connection, connection_record):
+    """Use WAL so readers never block on the writer, and wait for the write lock instead of failing"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.close()
+
 class CaseQuery(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     case_type = db.Column(db.String(50), nullable=False)
@@ -14,5 +29,283 @@ class CaseQuery(db.Model):
     status = db.Column(db.String(20), default='pending')  # 'pending', 'success', 'error'
     response = db.Column(db.Text)  # JSON string of the response
 
+    __table_args__ = (
+        # "All queries for this case", newest first
+        db.Index('ix_case_query_identity', 'court_type', 'court_name', 'case_type', 'case_number', 'year', 'query_date'),
+        # "Everything in the last hour" and keyset pagination over (query_date, id)
+        db.Index('ix_case_query_date', 'query_date'),
+    )
+
+    def to_dict(self, include_response=False):
+        data = {
+            'id': self.id,
+            'court_type': self.court_type,
+            'court_name': self.court_name,
+            'case_type': self.case_type,
+            'case_number': self.case_number,
+            'year': self.year,
+            'query_date': self.query_date.isoformat() if self.query_date else None,
+            'status': self.status,
+        }
+        if include_response:
+            data['response'] = json.loads(self.response) if self.response else None
+        return data
+
+    def __repr__(self):
+        return f'<CaseQuery {self.case_type} {self.case_number}/{self.year}>'
+
+class CachedResult(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'case' or 'causelist'
+    cache_key = db.Column(db.String(255), nullable=False)  # normalized lookup identity
+    payload = db.Column(db.Text, nullable=False)  # JSON string of the cached result
+    stored_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('kind', 'cache_key', name='uq_cached_result_key'),)
+
+    def __repr__(self):
+        return f'<CachedResult {self.kind} {self.cache_key}>'
+
+
+class DownloadJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    case_id = db.Column(db.String(50), nullable=False)
+    document_type = db.Column(db.String(20), nullable=False)  # 'judgment' or 'order'
+    status = db.Column(db.String(20), default='queued')  # 'queued', 'running', 'done', 'failed'
+    attempts = db.Column(db.Integer, default=0)
+    file_path = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_download_job_document', 'case_id', 'document_type'),
+        db.Index('ix_download_job_due', 'status', 'next_attempt_at'),
+        # At most one queued or running job per document, however many requests race to enqueue it
+        db.Index('uq_download_job_pending', 'case_id', 'document_type', unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')"),
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'case_id': self.case_id,
+            'document_type': self.document_type,
+            'status': self.status,
+            'attempts': self.attempts,
+            'file_path': self.file_path,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __repr__(self):
+        return f'<DownloadJob {self.id} {self.case_id} {self.document_type} {self.status}>'
+
+
+class DocumentBlob(db.Model):
+    sha256 = db.Column(db.String(64), primary_key=True)  # hex digest of the content
+    size = db.Column(db.Integer, nullable=False)
+    path = db.Column(db.String(255), nullable=False)  # relative to the downloads directory
+    stored_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_accessed = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<DocumentBlob {self.sha256[:12]} {self.size}>'
+
+
+class DocumentRef(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    case_id = db.Column(db.String(50), nullable=False)
+    document_type = db.Column(db.String(20), nullable=False)
+    sha256 = db.Column(db.String(64), db.ForeignKey('document_blob.sha256'), nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('case_id', 'document_type', name='uq_document_ref'),)
+
+    def __repr__(self):
+        return f'<DocumentRef {self.case_id} {self.document_type} -> {self.sha256[:12]}>'
+
+
+class DocumentText(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # rowid of the text in the document_fts index
+    sha256 = db.Column(db.String(64), nullable=False, unique=True)  # blob the text was extracted from
+    status = db.Column(db.String(20), nullable=False, default='indexing')  # 'indexing', 'indexed', 'failed'
+    chars = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DocumentText {self.sha256[:12]} {self.status}>'
+
+
+class WatchedCase(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    query_id = db.Column(db.Integer, db.ForeignKey('case_query.id'))  # query the watch was created from
+    case_type = db.Column(db.String(50), nullable=False)
+    case_number = db.Column(db.String(50), nullable=False)
+    year = db.Column(db.String(4), nullable=False)
+    court_type = db.Column(db.String(20), nullable=False)
+    court_name = db.Column(db.String(100), nullable=False)
+    snapshot = db.Column(db.Text)  # JSON string of the last fetched case details
+    poll_interval = db.Column(db.Integer, nullable=False)  # seconds
+    next_poll_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_polled_at = db.Column(db.DateTime)
+    last_changed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('court_type', 'court_name', 'case_type', 'case_number', 'year',
+                            name='uq_watched_case'),
+    )
+
+    def to_dict(self):
+        snapshot = json.loads(self.snapshot) if self.snapshot else {}
+        return {
+            'id': self.id,
+            'court_type': self.court_type,
+            'court_name': self.court_name,
+            'case_type': self.case_type,
+            'case_number': self.case_number,
+            'year': self.year,
+            'status': snapshot.get('status'),
+            'next_hearing_date': snapshot.get('next_hearing_date'),
+            'poll_interval': self.poll_interval,
+            'next_poll_at': self.next_poll_at.isoformat() if self.next_poll_at else None,
+            'last_polled_at': self.last_polled_at.isoformat() if self.last_polled_at else None,
+            'last_changed_at': self.last_changed_at.isoformat() if self.last_changed_at else None,
+        }
+
     def __repr__(self):
-        return f'<CaseQuery {self.case_type} {self.case_number}/{self.year}>'
\ No newline at end of file
+        return f'<WatchedCase {self.case_type} {self.case_number}/{self.year}>'
+
+
+class CaseChange(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    watch_id = db.Column(db.Integer, db.ForeignKey('watched_case.id'), nullable=False, index=True)
+    detected_at = db.Column(db.DateTime, default=datetime.utcnow)
+    changes = db.Column(db.Text, nullable=False)  # JSON string of the diff
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'watch_id': self.watch_id,
+            'detected_at': self.detected_at.isoformat() if self.detected_at else None,
+            'changes': json.loads(self.changes),
+        }
+
+    def __repr__(self):
+        return f'<CaseChange {self.watch_id} {self.detected_at}>'
+
+
+class CourtCase(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    court_type = db.Column(db.String(20), nullable=False)
+    court_name = db.Column(db.String(100), nullable=False)
+    case_type = db.Column(db.String(50), nullable=False)
+    case_number = db.Column(db.String(50), nullable=False)
+    year = db.Column(db.String(4), nullable=False)
+    portal_case_id = db.Column(db.String(50), index=True)  # case_id reported by the portal
+    status = db.Column(db.String(50))
+    filing_date = db.Column(db.String(10))  # YYYY-MM-DD
+    next_hearing_date = db.Column(db.String(10), index=True)  # YYYY-MM-DD, empty once disposed
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    parties = db.relationship('Party', backref='case', lazy='selectin', cascade='all, delete-orphan')
+    documents = db.relationship('CaseDocument', backref='case', lazy='selectin', cascade='all, delete-orphan')
+    hearings = db.relationship('Hearing', backref='case', lazy='selectin', cascade='all, delete-orphan',
+                               order_by='Hearing.hearing_date')
+
+    __table_args__ = (
+        db.UniqueConstraint('court_type', 'court_name', 'case_type', 'case_number', 'year',
+                            name='uq_court_case_identity'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'case_id': self.portal_case_id,
+            'court_type': self.court_type,
+            'court_name': self.court_name,
+            'case_type': self.case_type,
+            'case_number': self.case_number,
+            'year': self.year,
+            'status': self.status,
+            'filing_date': self.filing_date,
+            'next_hearing_date': self.next_hearing_date,
+            'parties': [{'role': p.role, 'name': p.name} for p in self.parties],
+            'documents': [{'id': d.document_id, 'type': d.document_type, 'date': d.date} for d in self.documents],
+            'hearings': [h.hearing_date for h in self.hearings],
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __repr__(self):
+        return f'<CourtCase {self.case_type} {self.case_number}/{self.year}>'
+
+
+class Party(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    case_id = db.Column(db.Integer, db.ForeignKey('court_case.id'), nullable=False, index=True)
+    role = db.Column(db.String(20), nullable=False)  # 'petitioner' or 'respondent'
+    name = db.Column(db.String(200), nullable=False)
+    name_key = db.Column(db.String(200), nullable=False, index=True)  # lowercased name for prefix search
+
+    def __repr__(self):
+        return f'<Party {self.role} {self.name}>'
+
+
+class CaseDocument(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    case_id = db.Column(db.Integer, db.ForeignKey('court_case.id'), nullable=False, index=True)
+    document_id = db.Column(db.String(100), nullable=False)  # document id reported by the portal
+    document_type = db.Column(db.String(20), nullable=False)  # 'judgment' or 'order'
+    date = db.Column(db.String(10))  # YYYY-MM-DD
+
+    __table_args__ = (db.UniqueConstraint('case_id', 'document_id', name='uq_case_document'),)
+
+    def __repr__(self):
+        return f'<CaseDocument {self.document_id}>'
+
+
+class Hearing(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    case_id = db.Column(db.Integer, db.ForeignKey('court_case.id'), nullable=False)
+    hearing_date = db.Column(db.String(10), nullable=False)  # YYYY-MM-DD
+    recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('case_id', 'hearing_date', name='uq_hearing'),)
+
+    def __repr__(self):
+        return f'<Hearing {self.case_id} {self.hearing_date}>'
+
+
+def init_db():
+    """
+    Create missing tables and indexes
+
+    create_all() skips tables that already exist, so indexes added to an
+    existing table are created separately.
+    """
+    db.create_all()
+    _supersede_duplicate_downloads()
+    engine = db.engine
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _supersede_duplicate_downloads():
+    """Fail all but the newest pending job of a document, which uq_download_job_pending requires"""
+    db.session.execute(db.text(
+        "UPDATE download_job SET status = 'failed', error = 'Superseded by an identical job' "
+        "WHERE status IN ('queued', 'running') AND EXISTS ("
+        "SELECT 1 FROM download_job newer "
+        "WHERE newer.case_id = download_job.case_id AND newer.document_type = download_job.document_type "
+        "AND newer.status IN ('queued', 'running') "
+        "AND (newer.created_at > download_job.created_at "
+        "OR (newer.created_at = download_job.created_at AND newer.id > download_job.id)))"
+    ))
+    db.session.commit()
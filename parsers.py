@@ -0,0 +1,293 @@
+"""
+HTML parsing backends for eCourts case status and cause list pages
+
+Every backend extracts the same dicts the scraper returns. The fastest
+installed backend is used by default: selectolax, then lxml, then
+BeautifulSoup, which is always available. Set HTML_PARSER to force one.
+"""
+import io
+import os
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover - optional dependency
+    lxml_html = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:  # pragma: no cover - optional dependency
+    SelectolaxHTMLParser = None
+
+CASE_FIELDS = ["case_id", "court", "case_type", "case_number", "year",
+               "filing_date", "next_hearing_date", "status"]
+INT_COLUMNS = {"serial_no"}
+
+
+def _case_result(fields, petitioner, respondent, documents):
+    result = {field: fields.get(field, "") for field in CASE_FIELDS}
+    result["parties"] = {"petitioner": petitioner, "respondent": respondent}
+    result["documents"] = documents
+    # Keep the key order of the scraper's own results
+    return {key: result[key] for key in [
+        "case_id", "court", "case_type", "case_number", "year", "parties",
+        "filing_date", "next_hearing_date", "status", "documents"]}
+
+
+def _entry(cells):
+    return {column: int(value) if column in INT_COLUMNS else value for column, value in cells}
+
+
+class ParserBackend:
+    """
+    Interface of a parsing backend
+
+    iter_cause_list() is a generator so callers can stream entries of
+    large cause lists without holding all of them. To read both the
+    header and the entries of a page, parse it once with parse_document()
+    and pass the document to cause_list_header() and cause_list_entries().
+    """
+
+    name = None
+
+    def parse_case_status(self, html):
+        """
+        Parse a case status page
+
+        Args:
+            html (str or bytes): Page markup
+
+        Returns:
+            dict: Case details in the shape of fetch_case_details
+        """
+        raise NotImplementedError
+
+    def parse_document(self, html):
+        """Parse page markup into the backend's document tree"""
+        raise NotImplementedError
+
+    def cause_list_header(self, document):
+        """Return court, date, judge and court_hall of a parsed cause list page"""
+        raise NotImplementedError
+
+    def cause_list_entries(self, document):
+        """Yield the entries of a parsed cause list page one at a time"""
+        raise NotImplementedError
+
+    def parse_cause_list_header(self, html):
+        """Return court, date, judge and court_hall of a cause list page"""
+        return self.cause_list_header(self.parse_document(html))
+
+    def iter_cause_list(self, html):
+        """Yield the entries of a cause list page one at a time"""
+        return self.cause_list_entries(self.parse_document(html))
+
+    def parse_cause_list(self, html):
+        """
+        Parse a cause list page
+
+        Returns:
+            dict: Cause list in the shape of fetch_cause_list
+        """
+        document = self.parse_document(html)
+        cause_list = self.cause_list_header(document)
+        cause_list["cases"] = list(self.cause_list_entries(document))
+        return cause_list
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup with the standard library html.parser, slow but always installed"""
+
+    name = "soup"
+
+    def parse_case_status(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        fields = {
+            row["data-field"]: row.td.get_text(strip=True)
+            for row in soup.select("#caseDetails tr[data-field]")
+        }
+        documents = [
+            {"type": row.select_one("td.type").get_text(strip=True),
+             "date": row.select_one("td.date").get_text(strip=True),
+             "id": row["data-id"]}
+            for row in soup.select("#orders tr[data-id]")
+        ]
+        petitioner = soup.select_one("p.petitioner")
+        respondent = soup.select_one("p.respondent")
+        return _case_result(
+            fields,
+            petitioner.get_text(strip=True) if petitioner else "",
+            respondent.get_text(strip=True) if respondent else "",
+            documents,
+        )
+
+    def parse_document(self, html):
+        return BeautifulSoup(html, "html.parser")
+
+    def cause_list_header(self, soup):
+        container = soup.select_one("#causeList")
+        judge = soup.select_one("#causeList p.judge")
+        hall = soup.select_one("#causeList p.court-hall")
+        return {
+            "court": container.get("data-court", "") if container else "",
+            "date": container.get("data-date", "") if container else "",
+            "judge": judge.get_text(strip=True) if judge else "",
+            "court_hall": hall.get_text(strip=True) if hall else "",
+        }
+
+    def cause_list_entries(self, soup):
+        for row in soup.select("#causeList tr.entry"):
+            yield _entry((td["class"][0], td.get_text(strip=True)) for td in row.find_all("td"))
+
+
+class LxmlBackend(ParserBackend):
+    """
+    lxml based backend
+
+    Cause lists read straight from markup are parsed incrementally with
+    iterparse, and each row is cleared once read, so memory stays flat
+    however long the list is.
+    """
+
+    name = "lxml"
+
+    def parse_document(self, html):
+        return lxml_html.fromstring(html)
+
+    def parse_case_status(self, html):
+        tree = lxml_html.fromstring(html)
+        fields = {
+            row.get("data-field"): row.findtext("td", "").strip()
+            for row in tree.xpath('//table[@id="caseDetails"]//tr[@data-field]')
+        }
+        documents = [
+            {"type": row.xpath('string(td[@class="type"])').strip(),
+             "date": row.xpath('string(td[@class="date"])').strip(),
+             "id": row.get("data-id")}
+            for row in tree.xpath('//table[@id="orders"]//tr[@data-id]')
+        ]
+        return _case_result(
+            fields,
+            tree.xpath('string(//p[@class="petitioner"])').strip(),
+            tree.xpath('string(//p[@class="respondent"])').strip(),
+            documents,
+        )
+
+    def cause_list_header(self, tree):
+        container = tree.find('.//div[@id="causeList"]')
+        return {
+            "court": container.get("data-court", "") if container is not None else "",
+            "date": container.get("data-date", "") if container is not None else "",
+            "judge": tree.xpath('string(//div[@id="causeList"]//p[@class="judge"])').strip(),
+            "court_hall": tree.xpath('string(//div[@id="causeList"]//p[@class="court-hall"])').strip(),
+        }
+
+    def cause_list_entries(self, tree):
+        for row in tree.xpath('//div[@id="causeList"]//tr[@class="entry"]'):
+            yield _entry((td.get("class"), td.text_content().strip()) for td in row.iterchildren("td"))
+
+    def parse_cause_list_header(self, html):
+        header = {"court": "", "date": "", "judge": "", "court_hall": ""}
+        for event, element in self._iterparse(html, ("start", "end"), ("div", "p", "table")):
+            if event == "start" and element.tag == "div" and element.get("id") == "causeList":
+                header["court"] = element.get("data-court", "")
+                header["date"] = element.get("data-date", "")
+            elif event == "end" and element.tag == "p":
+                if element.get("class") == "judge":
+                    header["judge"] = (element.text or "").strip()
+                elif element.get("class") == "court-hall":
+                    header["court_hall"] = (element.text or "").strip()
+            elif event == "start" and element.tag == "table":
+                # The header always precedes the entries
+                break
+        return header
+
+    def iter_cause_list(self, html):
+        for _, row in self._iterparse(html, ("end",), ("tr",)):
+            if row.get("class") == "entry":
+                yield _entry((td.get("class"), (td.text or "").strip()) for td in row.iterchildren("td"))
+            # Free rows already handled, together with their predecessors
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+
+    @staticmethod
+    def _iterparse(html, events, tags):
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        source = io.BytesIO(html) if isinstance(html, bytes) else html
+        return lxml_etree.iterparse(source, events=events, tag=tags, html=True, encoding="utf-8")
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax (lexbor) backend, the fastest when installed"""
+
+    name = "selectolax"
+
+    def parse_case_status(self, html):
+        tree = SelectolaxHTMLParser(html)
+        fields = {
+            row.attributes["data-field"]: row.css_first("td").text(strip=True)
+            for row in tree.css("#caseDetails tr[data-field]")
+        }
+        documents = [
+            {"type": row.css_first("td.type").text(strip=True),
+             "date": row.css_first("td.date").text(strip=True),
+             "id": row.attributes["data-id"]}
+            for row in tree.css("#orders tr[data-id]")
+        ]
+        petitioner = tree.css_first("p.petitioner")
+        respondent = tree.css_first("p.respondent")
+        return _case_result(
+            fields,
+            petitioner.text(strip=True) if petitioner else "",
+            respondent.text(strip=True) if respondent else "",
+            documents,
+        )
+
+    def parse_document(self, html):
+        return SelectolaxHTMLParser(html)
+
+    def cause_list_header(self, tree):
+        container = tree.css_first("#causeList")
+        judge = tree.css_first("#causeList p.judge")
+        hall = tree.css_first("#causeList p.court-hall")
+        return {
+            "court": container.attributes.get("data-court", "") if container else "",
+            "date": container.attributes.get("data-date", "") if container else "",
+            "judge": judge.text(strip=True) if judge else "",
+            "court_hall": hall.text(strip=True) if hall else "",
+        }
+
+    def cause_list_entries(self, tree):
+        for row in tree.css("#causeList tr.entry"):
+            yield _entry((td.attributes["class"], td.text(strip=True)) for td in row.css("td"))
+
+
+BACKENDS = {"soup": SoupBackend}
+if lxml_html is not None:
+    BACKENDS["lxml"] = LxmlBackend
+if SelectolaxHTMLParser is not None:
+    BACKENDS["selectolax"] = SelectolaxBackend
+
+PREFERENCE = ["selectolax", "lxml", "soup"]
+
+
+def get_parser(name=None):
+    """
+    Return a parser backend instance
+
+    Args:
+        name (str): Backend name, defaults to HTML_PARSER or the fastest installed backend
+
+    Raises:
+        ValueError: If the requested backend is unknown or not installed
+    """
+    name = name or os.environ.get("HTML_PARSER")
+    if name is None:
+        name = next(candidate for candidate in PREFERENCE if candidate in BACKENDS)
+    if name not in BACKENDS:
+        raise ValueError(f"HTML parser '{name}' is not available, installed: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
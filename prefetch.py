@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from batch_writer import batch_writer
+from cache import CAUSE_LIST_TTL, case_cache, case_key, case_ttl, cause_list_cache, cause_list_key
+from http_pool import submit
+from limits import CircuitOpenError
+from models import db, CachedResult, CourtCase
+from scraper import HIGH_COURTS, DISTRICT_COURTS, fetch_cause_list_async, iter_case_details
+
+logger = logging.getLogger(__name__)
+
+# Prefetch settings
+PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', '1').lower() in ('1', 'true', 'yes')
+PREFETCH_HOURS = os.environ.get('PREFETCH_HOURS', '22-6')  # local off-peak window, start-end hour
+PREFETCH_INTERVAL = int(os.environ.get('PREFETCH_INTERVAL', '3600'))  # seconds between runs in the window
+PREFETCH_HEARING_DAYS = int(os.environ.get('PREFETCH_HEARING_DAYS', '2'))
+PREFETCH_COURT_BUDGET = int(os.environ.get('PREFETCH_COURT_BUDGET', '50'))  # upstream calls per court per run
+PREFETCH_CONCURRENCY = int(os.environ.get('PREFETCH_CONCURRENCY', '1'))  # in-flight calls per court
+PREFETCH_TICK = 60  # seconds between checks of the window
+
+
+def _window(hours):
+    start, end = (int(hour) for hour in hours.split('-'))
+    return start, end
+
+
+def in_window(now, hours=PREFETCH_HOURS):
+    """Whether now falls in the start-end hour window, which may wrap past midnight"""
+    start, end = _window(hours)
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def target_date(now, hours=PREFETCH_HOURS):
+    """
+    The court day a pass prepares for
+
+    A pass made before the window closes on the morning of a day, such as
+    01:00 in the default 22-6 window, prepares for that same day. Any
+    other pass prepares for the next day.
+    """
+    _, end = _window(hours)
+    if now.hour < end <= 12:
+        return now.date()
+    return now.date() + timedelta(days=1)
+
+
+def seconds_until_end_of(day, now):
+    """Seconds from now until the end of day, so prefetched entries last through its peak"""
+    return (datetime.combine(day + timedelta(days=1), datetime.min.time()) - now).total_seconds()
+
+
+def hearing_cases(today, days=PREFETCH_HEARING_DAYS):
+    """Known cases with a hearing from today through the next days, soonest first"""
+    until = (today + timedelta(days=days)).isoformat()
+    return (
+        CourtCase.query
+        .filter(CourtCase.next_hearing_date >= today.isoformat(), CourtCase.next_hearing_date <= until)
+        .order_by(CourtCase.next_hearing_date)
+        .all()
+    )
+
+
+class Prefetcher:
+    """
+    Warm the result caches ahead of the morning peak
+
+    Inside the off-peak window, every PREFETCH_INTERVAL one process runs a
+    pass that fetches the next court day's cause list of every court and
+    the cases whose next hearing is close. Each court gets at most
+    PREFETCH_COURT_BUDGET upstream calls per pass, on top of the regular
+    rate limits. Results go into the same caches that serve /api/causelist
+    and /api/search, and are kept at least until that day is over.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def start(self):
+        """Start the prefetch thread once per process"""
+        if not PREFETCH_ENABLED:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._run, name='prefetcher', daemon=True)
+            thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                try:
+                    now = datetime.now()
+                    if in_window(now):
+                        run = self._claim_run(now)
+                        if run is not None:
+                            run.payload = json.dumps(self.run(now))
+                            db.session.commit()
+                except Exception:
+                    logger.exception("Prefetch pass failed")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                time.sleep(PREFETCH_TICK)
+
+    def _claim_run(self, now):
+        """
+        Claim the current interval's pass, so only one of several processes runs it
+
+        The claim is a row in the cached_result table, whose unique key lets
+        exactly one insert succeed. The row later holds the pass's counts.
+        """
+        run = CachedResult(
+            kind='prefetch', cache_key=str(int(now.timestamp() // PREFETCH_INTERVAL)), payload='{}',
+            stored_at=datetime.utcnow(), expires_at=datetime.utcnow() + timedelta(days=7),
+        )
+        db.session.add(run)
+        try:
+            db.session.commit()
+            return run
+        except IntegrityError:
+            db.session.rollback()
+            return None
+
+    def last_run(self):
+        """Counts of the most recent scheduled pass of any process, or None"""
+        run = (
+            CachedResult.query.filter_by(kind='prefetch')
+            .order_by(CachedResult.stored_at.desc())
+            .first()
+        )
+        if run is None:
+            return None
+        return dict(json.loads(run.payload), started_at=run.stored_at.isoformat())
+
+    def run(self, now=None):
+        """
+        Run one prefetch pass, must be called within an application context
+
+        Refreshed cases reach the normalized tables through the batch
+        writer, like every other case write.
+
+        Returns:
+            dict: Counts of cause lists and cases fetched, skipped for
+            budget and failed
+        """
+        now = now or datetime.now()
+        day = target_date(now)
+        date = day.isoformat()
+        # Entries must outlive the peak of the day they were fetched for
+        keep = seconds_until_end_of(day, now)
+        spent = Counter()
+        stats = Counter()
+
+        # The day's cause lists, one call per court
+        courts = [('high', name) for name in HIGH_COURTS] + [('district', name) for name in DISTRICT_COURTS]
+        futures = {}
+        for court_type, court_name in courts:
+            if PREFETCH_COURT_BUDGET < 1:
+                stats['skipped'] += 1
+                continue
+            spent[court_type, court_name] += 1
+            futures[submit(fetch_cause_list_async(court_type, court_name, date))] = (court_type, court_name)
+        for future in as_completed(futures):
+            court_type, court_name = futures[future]
+            try:
+                result = future.result()
+            except CircuitOpenError as e:
+                result = e.to_result()
+            if 'error' in result:
+                stats['errors'] += 1
+                continue
+            cause_list_cache.put(cause_list_key(court_type, court_name, date), result,
+                                 ttl=max(CAUSE_LIST_TTL, keep))
+            stats['cause_lists'] += 1
+
+        # Cases with an upcoming hearing, within what is left of each court's budget
+        queries = []
+        for case in hearing_cases(day):
+            court = (case.court_type.lower(), case.court_name)
+            if spent[court] >= PREFETCH_COURT_BUDGET:
+                stats['skipped'] += 1
+                continue
+            spent[court] += 1
+            queries.append({
+                'court_type': case.court_type, 'court_name': case.court_name,
+                'case_type': case.case_type, 'case_number': case.case_number, 'year': case.year,
+            })
+        for index, result in iter_case_details(queries, PREFETCH_CONCURRENCY):
+            if 'error' in result:
+                stats['errors'] += 1
+                continue
+            case_cache.put(case_key(**queries[index]), result, ttl=max(case_ttl(result), keep))
+            batch_writer.submit('case', {'query': queries[index], 'result': result})
+            stats['cases'] += 1
+
+        stats = {key: stats[key] for key in ('cause_lists', 'cases', 'skipped', 'errors')}
+        stats['cause_list_date'] = date
+        logger.info("Prefetch pass finished", extra=stats)
+        return stats
+
+
+prefetcher = Prefetcher()
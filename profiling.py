@@ -0,0 +1,242 @@
+"""
+On-demand request profiling
+
+A request is profiled when its PROFILE_HEADER header carries the
+PROFILE_SECRET value or it is picked at PROFILE_SAMPLE_RATE. Only one
+request per process is profiled at a time. The view runs under cProfile
+in the request thread. Scraper coroutines it hands to the event loop,
+and the tasks they start, are profiled step by step on the loop thread.
+Both halves are saved together as one pstats file, readable with pstats,
+snakeviz, or flameprof/gprof2dot for flame graphs.
+
+Python 3.12+ allows only one enabled profiler per process, and it sees
+every thread. There the request profiler is paused while the request
+thread waits on the loop, and a loop step that finds it running is
+already covered by it. Work of concurrent requests can then show up in
+the profile.
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import cProfile
+import functools
+import hmac
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import types
+import uuid
+
+from flask import request
+
+PROFILE_DIR = os.environ.get(
+    'PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+)
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))  # fraction of requests
+PROFILE_HEADER = os.environ.get('PROFILE_HEADER', 'X-Profile')
+PROFILE_SECRET = os.environ.get('PROFILE_SECRET', '')  # header value that opts in, empty disables opt-in
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '100'))  # newest profiles kept on disk
+
+# The profiling session of the running request, or of the task that was started by it
+_session = contextvars.ContextVar('profile_session', default=None)
+_prune_lock = threading.Lock()
+# Held by the one request of this process being profiled
+_profiling_lock = threading.Lock()
+
+
+class _Session:
+    def __init__(self):
+        self.request_profile = cProfile.Profile()
+        self.request_thread = threading.get_ident()
+        self.loop_profile = cProfile.Profile()
+        self.loop_used = False
+        self.active = True
+
+
+def _enable(profile):
+    """Enable profile, False when another profiler is already running (Python 3.12+)"""
+    try:
+        profile.enable()
+        return True
+    except ValueError:
+        return False
+
+
+@contextlib.contextmanager
+def paused():
+    """Pause the request profiler while the request thread blocks on the scraper loop"""
+    session = _session.get()
+    if session is None or not session.active or session.request_thread != threading.get_ident():
+        yield
+        return
+    session.request_profile.disable()
+    try:
+        yield
+    finally:
+        _enable(session.request_profile)
+
+
+def wrap(coro):
+    """Profile coro on the loop when it is submitted by a profiled request"""
+    session = _session.get()
+    if session is None:
+        return coro
+    return _in_session(coro, session)
+
+
+def task_factory(loop, coro, **kwargs):
+    """Event loop task factory that extends a profiling session to child tasks"""
+    session = _session.get()
+    if session is not None:
+        coro = _in_task(coro, session)
+    return asyncio.Task(coro, loop=loop, **kwargs)
+
+
+async def _in_task(coro, session):
+    # Tasks only take native coroutines, _stepped is a generator-based one
+    return await _stepped(coro, session)
+
+
+async def _in_session(coro, session):
+    # Runs in the task's own context, so tasks started from here inherit the session
+    _session.set(session)
+    return await _stepped(coro, session)
+
+
+@types.coroutine
+def _stepped(coro, session):
+    """Drive coro one step at a time with the loop profiler enabled only during its own steps"""
+    value, error = None, None
+    while True:
+        profiling = session.active and _enable(session.loop_profile)
+        if profiling:
+            session.loop_used = True
+        try:
+            if error is not None:
+                yielded = coro.throw(error)
+            else:
+                yielded = coro.send(value)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            if profiling:
+                session.loop_profile.disable()
+        try:
+            value, error = (yield yielded), None
+        except BaseException as e:
+            value, error = None, e
+
+
+def authorized():
+    """Whether the request carries PROFILE_SECRET in PROFILE_HEADER"""
+    value = request.headers.get(PROFILE_HEADER, '') if PROFILE_HEADER else ''
+    return bool(PROFILE_SECRET) and hmac.compare_digest(value.encode(), PROFILE_SECRET.encode())
+
+
+def _should_profile():
+    if authorized():
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def profiled(view):
+    """Decorator for Flask views that profiles the requests selected for profiling"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _should_profile() or not _profiling_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+
+        try:
+            session = _Session()
+            token = _session.set(session)
+            start = time.perf_counter()
+            try:
+                if not _enable(session.request_profile):
+                    # Another profiler owns the process, run the view unprofiled
+                    session.active = False
+                    return view(*args, **kwargs)
+                try:
+                    response = view(*args, **kwargs)
+                finally:
+                    session.request_profile.disable()
+            finally:
+                elapsed = time.perf_counter() - start
+                _session.reset(token)
+            profile_id = _save(session.request_profile, session, view.__name__, elapsed)
+        finally:
+            _profiling_lock.release()
+
+        # Views return a response or a (response, status) tuple
+        target = response[0] if isinstance(response, tuple) else response
+        if hasattr(target, 'headers'):
+            target.headers['X-Profile-Id'] = profile_id
+        return response
+    return wrapper
+
+
+def _close(session):
+    """Stop the loop half of a session on the loop thread, so no step is mid-flight"""
+    from http_pool import get_loop
+
+    done = concurrent.futures.Future()
+
+    def stop():
+        session.active = False
+        done.set_result(None)
+
+    get_loop().call_soon_threadsafe(stop)
+    done.result(timeout=5)
+
+
+def _save(profile, session, endpoint, elapsed):
+    stats = pstats.Stats(profile)
+    if session.loop_used:
+        _close(session)
+        stats.add(session.loop_profile)
+    session.active = False
+
+    profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stats.dump_stats(os.path.join(PROFILE_DIR, f'{profile_id}.prof'))
+    with open(os.path.join(PROFILE_DIR, f'{profile_id}.json'), 'w') as f:
+        json.dump({
+            'id': profile_id,
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'created_at': time.time(),
+            'duration': round(elapsed, 6),
+            'calls': stats.total_calls,
+        }, f)
+    _prune()
+    return profile_id
+
+
+def _prune():
+    with _prune_lock:
+        names = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith('.json'))
+        for name in names[:max(0, len(names) - PROFILE_KEEP)]:
+            for suffix in ('.json', '.prof'):
+                try:
+                    os.unlink(os.path.join(PROFILE_DIR, name[:-5] + suffix))
+                except FileNotFoundError:
+                    pass
+
+
+def recent_profiles(limit=50):
+    """Metadata of the newest saved profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith('.json')), reverse=True)
+    profiles = []
+    for name in names[:limit]:
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
@@ -1,15 +1,31 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import os
-import json
-import time
+import logging
 import random
 from datetime import datetime, timedelta
 
-# Base URLs for different court systems
+from concurrent.futures import as_completed
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin
+
+import docstore
+from courts import HIGH_COURTS, DISTRICT_COURTS, COURTS, CASE_TYPES, CASE_TYPE_CODES, CaseId, court_code
+from http_pool import MAX_CONCURRENCY_PER_COURT, court_slot, get_session, run_sync, submit
+import limits
+import metrics
+from limits import CircuitOpenError
+from parsers import get_parser
+from singleflight import SingleFlight
+
+# Base URLs for different court systems. The live portals are not fetched
+# yet, lookups are simulated unless ECOURTS_UPSTREAM is set.
 HIGH_COURT_BASE_URL = "https://hcservices.ecourts.gov.in/ecourtindiaHC/"
 DISTRICT_COURT_BASE_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
 
+# Base URL of an eCourts stand-in such as benchmarks/mock_ecourts.py. When
+# set, pages are fetched over HTTP and parsed instead of being simulated.
+ECOURTS_UPSTREAM = os.environ.get('ECOURTS_UPSTREAM')
+
 # Headers to mimic browser request
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -19,73 +35,25 @@ HEADERS = {
     'Upgrade-Insecure-Requests': '1',
 }
 
-# Dictionary mapping court names to their codes
-HIGH_COURTS = {
-    "Allahabad": "1",
-    "Bombay": "2",
-    "Delhi": "3",
-    "Madras": "4",
-    "Karnataka": "5",
-    "Madhya Pradesh": "6",
-    "Gujarat": "7",
-    "Calcutta": "8",
-    "Patna": "9",
-    "Rajasthan": "10",
-    "Kerala": "11",
-    "Punjab and Haryana": "12",
-    "Telangana": "13",
-    "Andhra Pradesh": "14",
-    "Orissa": "15",
-    "Jharkhand": "16",
-    "Chhattisgarh": "17",
-    "Uttarakhand": "18",
-    "Himachal Pradesh": "19",
-    "Jammu and Kashmir": "20",
-    "Sikkim": "21",
-    "Manipur": "22",
-    "Meghalaya": "23",
-    "Tripura": "24",
-    "Guwahati": "25"
-}
-
-DISTRICT_COURTS = {
-    "Delhi": "1",
-    "Mumbai": "2",
-    "Chennai": "3",
-    "Bangalore": "4",
-    "Hyderabad": "5",
-    "Ahmedabad": "6",
-    "Kolkata": "7",
-    "Pune": "8",
-    "Jaipur": "9",
-    "Lucknow": "10",
-    "Chandigarh": "11",
-    "Bhopal": "12",
-    "Patna": "13",
-    "Guwahati": "14",
-    "Kochi": "15"
-}
-
-# Common case types
-CASE_TYPES = {
-    "CRL.A": "Criminal Appeal",
-    "CWP": "Civil Writ Petition",
-    "CRM": "Criminal Miscellaneous",
-    "WP": "Writ Petition",
-    "CS": "Civil Suit",
-    "SA": "Second Appeal",
-    "CRA": "Criminal Revision Application",
-    "CRLA": "Criminal Appeal",
-    "MACA": "Motor Accident Claims Appeal",
-    "FAO": "First Appeal from Order"
-}
-
 # Case status options
 CASE_STATUS = ["Pending", "Disposed", "In Progress", "Listed for Arguments", "Reserved for Judgment", "Adjourned"]
 
+logger = logging.getLogger(__name__)
+
+# Concurrent identical case and cause list lookups share one upstream fetch
+_inflight = SingleFlight()
+
 def fetch_case_details(court_type, court_name, case_type, case_number, year):
     """
     Fetch case details from the eCourts portal
+
+    Synchronous wrapper around fetch_case_details_async, see there for details.
+    """
+    return run_sync(fetch_case_details_async(court_type, court_name, case_type, case_number, year))
+
+async def fetch_case_details_async(court_type, court_name, case_type, case_number, year):
+    """
+    Fetch case details from the eCourts portal
     
     Args:
         court_type (str): 'high' or 'district'
@@ -97,34 +65,169 @@ def fetch_case_details(court_type, court_name, case_type, case_number, year):
     Returns:
         dict: Case details including parties, dates, status, and available documents
     """
+    key = ('case', str(court_type).lower(), court_name, case_type, case_number, year)
+    return await _inflight.do(
+        key, lambda: _fetch_case_details(court_type, court_name, case_type, case_number, year)
+    )
+
+async def _fetch_case_details(court_type, court_name, case_type, case_number, year):
     try:
         # Log the request
-        print(f"Fetching case details for {case_type} {case_number}/{year} from {court_name} {court_type} Court")
+        logger.info("Fetching case details", extra={
+            'court_type': court_type, 'court': court_name,
+            'case_type': case_type, 'case_number': case_number, 'year': year,
+        })
+        
+        # Unknown courts never reach the limiters, breakers or upstream
+        error = _court_error(court_type, court_name)
+        if error is not None:
+            return error
         
-        # Add a small delay to simulate network request
-        time.sleep(1)
+        if ECOURTS_UPSTREAM:
+            async with _upstream(court_type, court_name):
+                page = await _get_page('case_status', {
+                    'court_type': court_type.lower(), 'court_name': court_name,
+                    'case_type': case_type, 'case_number': case_number, 'year': year,
+                })
+            with metrics.timed('parse'):
+                return await _parse(get_parser().parse_case_status, page)
         
-        if court_type.lower() == 'high':
-            return fetch_high_court_case(court_name, case_type, case_number, year)
-        elif court_type.lower() == 'district':
-            return fetch_district_court_case(court_name, case_type, case_number, year)
-        else:
-            return {"error": "Invalid court type. Use 'high' or 'district'"}
+        async with _upstream(court_type, court_name):
+            # Add a small delay to simulate network request
+            await asyncio.sleep(1)
+        
+        with metrics.timed('parse'):
+            if court_type.lower() == 'high':
+                return fetch_high_court_case(court_name, case_type, case_number, year)
+            elif court_type.lower() == 'district':
+                return fetch_district_court_case(court_name, case_type, case_number, year)
+            else:
+                return {"error": "Invalid court type. Use 'high' or 'district'"}
+    except CircuitOpenError:
+        raise
     except Exception as e:
+        logger.exception("Case details fetch failed", extra={'court_type': court_type, 'court': court_name})
+        metrics.error(e, 'case_details')
         return {"error": f"Failed to fetch case details: {str(e)}"}
 
+def iter_case_details(queries, per_court_limit=None):
+    """
+    Fetch details for many cases concurrently
+    
+    Args:
+        queries (list): Dicts with court_type, court_name, case_type, case_number and year
+        per_court_limit (int): Maximum in-flight lookups per court for this batch
+        
+    Yields:
+        tuple: (index, result) for each query, in completion order. Queries
+        for a court whose circuit is open yield an error with retry_after.
+    """
+    limit = max(1, min(per_court_limit or MAX_CONCURRENCY_PER_COURT, MAX_CONCURRENCY_PER_COURT))
+    batch_slots = {}
+    
+    async def limited(query):
+        error = _court_error(query['court_type'], query['court_name'])
+        if error is not None:
+            return error
+        key = _court_key(query['court_type'], query['court_name'])
+        slot = batch_slots.setdefault(key, asyncio.Semaphore(limit))
+        async with slot:
+            return await fetch_case_details_async(
+                query['court_type'], query['court_name'],
+                query['case_type'], query['case_number'], query['year']
+            )
+    
+    futures = {submit(limited(query)): index for index, query in enumerate(queries)}
+    try:
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except CircuitOpenError as e:
+                result = e.to_result()
+            yield futures[future], result
+    finally:
+        # Stop outstanding lookups if the consumer goes away
+        for future in futures:
+            future.cancel()
+
+def _court_error(court_type, court_name):
+    """Error result for an unsupported court, None for a supported one"""
+    court_type = str(court_type).lower()
+    if court_type not in COURTS:
+        return {"error": "Invalid court type. Use 'high' or 'district'"}
+    if court_name not in COURTS[court_type]:
+        kind = "High" if court_type == 'high' else "District"
+        return {"error": f"Court '{court_name}' not found in supported {kind} Courts"}
+    return None
+
+def _court_key(court_type, court_name):
+    """
+    Key identifying a court for concurrency, rate limiting and circuit breaking
+    
+    Raises:
+        ValueError: For an unsupported court, which must be rejected before
+        any per-court state is created for it
+    """
+    court_type = str(court_type).lower()
+    code = court_code(court_type, court_name)
+    if code is None:
+        raise ValueError(f"Unsupported court '{court_type}:{court_name}'")
+    return f"{court_type}:{code}"
+
+@asynccontextmanager
+async def _upstream(court_type, court_name):
+    """
+    Guard one upstream call to a court
+    
+    Fails fast with CircuitOpenError while the court's breaker is open,
+    otherwise waits for a rate limit token and a concurrency slot. Errors
+    raised inside the block count as failures of the court.
+    """
+    key = _court_key(court_type, court_name)
+    circuit = limits.breaker(key)
+    if not circuit.allow():
+        metrics.error('CircuitOpenError', 'upstream')
+        raise CircuitOpenError(key, circuit.retry_after())
+    in_flight = metrics.UPSTREAM_IN_FLIGHT.labels(key)
+    try:
+        await limits.limiter(key).acquire()
+        async with court_slot(key):
+            in_flight.inc()
+            try:
+                with metrics.timed('fetch'):
+                    yield
+            finally:
+                in_flight.dec()
+    except Exception as e:
+        circuit.record_failure()
+        metrics.error(e, 'upstream')
+        raise
+    else:
+        circuit.record_success()
+    finally:
+        circuit.trial_in_flight = False
+
+async def _parse(parse, page):
+    """Run a CPU bound parser in the loop's executor instead of stalling every fetch on the loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, parse, page)
+
+async def _get_page(path, params):
+    """GET a page from ECOURTS_UPSTREAM through the pooled session, errors raise"""
+    session = get_session(ECOURTS_UPSTREAM, HEADERS)
+    async with session.get(urljoin(ECOURTS_UPSTREAM, path), params=params) as response:
+        response.raise_for_status()
+        return await response.read()
+
 def fetch_high_court_case(court_name, case_type, case_number, year):
     """Fetch case details from High Court"""
     if court_name not in HIGH_COURTS:
         return {"error": f"Court '{court_name}' not found in supported High Courts"}
     
-    court_code = HIGH_COURTS[court_name]
-    
     # In a real implementation, we would make actual HTTP requests
     # For demonstration, we'll create more realistic simulated data
     
     # Generate a unique case ID
-    case_id = f"HC{court_code}{case_number}{year}"
+    case_id = str(CaseId('high', court_name, case_number, year))
     
     # Generate random dates
     filing_date = f"{year}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
@@ -204,10 +307,8 @@ def fetch_district_court_case(court_name, case_type, case_number, year):
     if court_name not in DISTRICT_COURTS:
         return {"error": f"Court '{court_name}' not found in supported District Courts"}
     
-    court_code = DISTRICT_COURTS[court_name]
-    
     # Similar to high court case but with district court specific details
-    case_id = f"DC{court_code}{case_number}{year}"
+    case_id = str(CaseId('district', court_name, case_number, year))
     
     # Generate random dates
     filing_date = f"{year}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
@@ -284,68 +385,106 @@ def fetch_district_court_case(court_name, case_type, case_number, year):
 
 def download_judgment(case_id, document_type):
     """
-    Download judgment or order document
+    Download judgment or order document into the document store
+
+    Must be called within an application context, since the document
+    store index lives in the database.
     
     Args:
         case_id (str): Case ID
         document_type (str): 'judgment' or 'order'
         
     Returns:
-        str: Path to downloaded file or error message
+        str: Path of the stored file relative to the downloads directory, or error message
     """
+    document = run_sync(download_judgment_async(case_id, document_type))
+    if isinstance(document, dict):
+        return document
+    
     try:
-        print(f"Downloading {document_type} for case {case_id}")
-        
-        # Add a small delay to simulate network request
-        time.sleep(1.5)
+        return docstore.put(case_id, document_type, document)
+    except Exception as e:
+        return {"error": f"Failed to store document: {str(e)}"}
+
+async def download_judgment_async(case_id, document_type):
+    """
+    Download judgment or order document
+    
+    Args:
+        case_id (str): Case ID
+        document_type (str): 'judgment' or 'order'
         
-        # In a real implementation, you would make an HTTP request to download the document
-        # For demonstration, create a dummy PDF file with more realistic content
+    Returns:
+        bytes: Document content, or dict with an error message
+    """
+    try:
+        logger.info("Downloading document", extra={'case_id': case_id, 'document_type': document_type})
         
-        download_dir = 'downloads'
-        os.makedirs(download_dir, exist_ok=True)
+        try:
+            case = CaseId.decode(case_id)
+        except ValueError as e:
+            return {"error": str(e)}
         
-        filename = f"{case_id}_{document_type}_{int(time.time())}.pdf"
-        file_path = os.path.join(download_dir, filename)
+        if ECOURTS_UPSTREAM:
+            async with _upstream(case.court_type, case.court_name):
+                return await _get_page('display_pdf', {'case_id': case_id, 'document_type': document_type})
         
-        # Create a dummy PDF file with more realistic content
-        with open(file_path, 'w') as f:
-            court_type = "High Court" if case_id.startswith("HC") else "District Court"
-            court_code = case_id[2]
-            
-            if court_type == "High Court":
-                court_name = list(HIGH_COURTS.keys())[list(HIGH_COURTS.values()).index(court_code)]
-            else:
-                court_name = list(DISTRICT_COURTS.keys())[list(DISTRICT_COURTS.values()).index(court_code)]
-                
-            f.write(f"IN THE {court_type.upper()} OF {court_name.upper()}\n\n")
-            f.write(f"Case No: {case_id[3:-4]}/{case_id[-4:]}\n\n")
-            
-            if document_type == "order":
-                f.write("ORDER\n\n")
-                f.write("The matter is listed today for hearing. After hearing the arguments of both sides, ")
-                f.write("the Court is of the view that further evidence is required. ")
-                f.write("The matter is adjourned to a later date to be notified.\n\n")
-                f.write("Ordered accordingly.\n\n")
-            else:  # judgment
-                f.write("JUDGMENT\n\n")
-                f.write("Having heard the parties at length and having perused the material on record, ")
-                f.write("this Court is of the considered view that the petition deserves to be allowed ")
-                f.write("in part. The respondents are directed to consider the representation of the ")
-                f.write("petitioner in accordance with law within a period of 8 weeks from today.\n\n")
-                f.write("The petition stands disposed of in the above terms.\n\n")
-            
-            f.write(f"Date: {datetime.now().strftime('%d/%m/%Y')}\n")
-            f.write(f"JUDGE")
+        async with _upstream(case.court_type, case.court_name):
+            # Add a small delay to simulate network request
+            await asyncio.sleep(1.5)
         
-        return filename
+        # In a real implementation, you would make an HTTP request to download the document
+        # For demonstration, create a dummy PDF file with more realistic content
+        return _render_document(case, document_type)
     
     except Exception as e:
+        logger.exception("Document download failed", extra={'case_id': case_id, 'document_type': document_type})
+        metrics.error(e, 'download')
         return {"error": f"Failed to download document: {str(e)}"}
 
+def _render_document(case, document_type):
+    """Create dummy document content with a realistic layout"""
+    court_type = "High Court" if case.court_type == 'high' else "District Court"
+    lines = [
+        f"IN THE {court_type.upper()} OF {case.court_name.upper()}\n\n",
+        f"Case No: {case.case_number}/{case.year}\n\n",
+    ]
+    
+    if document_type == "order":
+        lines += [
+            "ORDER\n\n",
+            "The matter is listed today for hearing. After hearing the arguments of both sides, ",
+            "the Court is of the view that further evidence is required. ",
+            "The matter is adjourned to a later date to be notified.\n\n",
+            "Ordered accordingly.\n\n",
+        ]
+    else:  # judgment
+        lines += [
+            "JUDGMENT\n\n",
+            "Having heard the parties at length and having perused the material on record, ",
+            "this Court is of the considered view that the petition deserves to be allowed ",
+            "in part. The respondents are directed to consider the representation of the ",
+            "petitioner in accordance with law within a period of 8 weeks from today.\n\n",
+            "The petition stands disposed of in the above terms.\n\n",
+        ]
+    
+    lines += [
+        f"Date: {datetime.now().strftime('%d/%m/%Y')}\n",
+        "JUDGE",
+    ]
+    return "".join(lines).encode("utf-8")
+
 def fetch_cause_list(court_type, court_name, date):
     """
     Fetch cause list for a specific court and date
+
+    Synchronous wrapper around fetch_cause_list_async, see there for details.
+    """
+    return run_sync(fetch_cause_list_async(court_type, court_name, date))
+
+async def fetch_cause_list_async(court_type, court_name, date):
+    """
+    Fetch cause list for a specific court and date
     
     Args:
         court_type (str): 'high' or 'district'
@@ -355,93 +494,188 @@ def fetch_cause_list(court_type, court_name, date):
     Returns:
         dict: Cause list details
     """
-    try:
-        print(f"Fetching cause list for {court_name} {court_type} Court on {date}")
+    header, document = await open_cause_list_async(court_type, court_name, date)
+    if 'error' in header:
+        return header
+    cases = await _parse(list, cause_list_entries(court_type, court_name, date, document))
+    return dict(header, cases=cases)
+
+def open_cause_list(court_type, court_name, date):
+    """
+    Fetch a cause list and return its entries lazily
+    
+    Args:
+        court_type (str): 'high' or 'district'
+        court_name (str): Name of the court
+        date (str): Date in YYYY-MM-DD format
         
-        # Add a small delay to simulate network request
-        time.sleep(1.2)
+    Returns:
+        tuple: (header, entries) where header holds court, date, judge and
+        court_hall (or an error) and entries is a generator of cause list
+        entries, produced one at a time as the page is parsed
+    """
+    header, document = run_sync(open_cause_list_async(court_type, court_name, date))
+    if 'error' in header:
+        return header, iter(())
+    return header, cause_list_entries(court_type, court_name, date, document)
+
+async def open_cause_list_async(court_type, court_name, date):
+    """
+    Fetch the cause list page for a court and date and parse it
+    
+    The page is parsed once, off the loop, and the same document is read
+    for the header here and for the entries by cause_list_entries.
+    
+    Returns:
+        tuple: (header, document) where header holds court, date, judge and
+        court_hall or an error message, and document is the parsed page to
+        pass to cause_list_entries (None when simulated)
+    """
+    key = ('causelist', str(court_type).lower(), court_name, date)
+    return await _inflight.do(
+        key, lambda: _open_cause_list(court_type, court_name, date), copy=_copy_opened_cause_list
+    )
+
+def _copy_opened_cause_list(opened):
+    # Parsed documents are only ever read, and some backends' trees cannot be copied
+    header, document = opened
+    return dict(header), document
+
+async def _open_cause_list(court_type, court_name, date):
+    try:
+        logger.info("Fetching cause list", extra={'court_type': court_type, 'court': court_name, 'date': date})
         
         # Validate court type and name
-        if court_type.lower() == 'high' and court_name not in HIGH_COURTS:
-            return {"error": f"Court '{court_name}' not found in supported High Courts"}
-        elif court_type.lower() == 'district' and court_name not in DISTRICT_COURTS:
-            return {"error": f"Court '{court_name}' not found in supported District Courts"}
+        error = _court_error(court_type, court_name)
+        if error is not None:
+            return error, None
         
-        # Create a more realistic cause list
-        cause_list = {
-            "court": court_name,
-            "date": date,
-            "cases": []
-        }
-        
-        # Generate a random number of cases (10-30)
-        num_cases = random.randint(10, 30)
+        if ECOURTS_UPSTREAM:
+            async with _upstream(court_type, court_name):
+                page = await _get_page('cause_list', {
+                    'court_type': court_type.lower(), 'court_name': court_name, 'date': date,
+                })
+            with metrics.timed('parse'):
+                return await _parse(_parse_cause_list, page)
         
-        # List of judges
-        judges = [
-            "Hon'ble Justice A.K. Sharma", 
-            "Hon'ble Justice P.N. Desai",
-            "Hon'ble Justice S.R. Mehta",
-            "Hon'ble Justice M.K. Gupta",
-            "Hon'ble Justice R.S. Chauhan"
-        ]
+        async with _upstream(court_type, court_name):
+            # Add a small delay to simulate network request
+            await asyncio.sleep(1.2)
         
-        # List of court halls
-        court_halls = ["Court Hall 1", "Court Hall 2", "Court Hall 3", "Court Hall 4"]
+        _, judge, court_hall = _cause_list_header(_cause_list_rng(court_type, court_name, date))
+        return {
+            "court": court_name,
+            "date": date,
+            "judge": judge,
+            "court_hall": court_hall
+        }, None
+    
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.exception("Cause list fetch failed", extra={'court_type': court_type, 'court': court_name})
+        metrics.error(e, 'cause_list')
+        return {"error": f"Failed to fetch cause list: {str(e)}"}, None
+
+def _parse_cause_list(page):
+    parser = get_parser()
+    document = parser.parse_document(page)
+    return parser.cause_list_header(document), document
+
+def _cause_list_rng(court_type, court_name, date):
+    """
+    Random generator for a simulated cause list
+    
+    A court's list for a date does not change between requests, so the
+    simulation is seeded by court and date. This keeps cursors and
+    cached copies consistent with fresh fetches.
+    """
+    return random.Random(f"{court_type.lower()}|{court_name}|{date}")
+
+def _cause_list_header(rng):
+    """Draw the number of cases, judge and court hall of a simulated cause list"""
+    # Generate a random number of cases (10-30)
+    num_cases = rng.randint(10, 30)
+    
+    # List of judges
+    judges = [
+        "Hon'ble Justice A.K. Sharma", 
+        "Hon'ble Justice P.N. Desai",
+        "Hon'ble Justice S.R. Mehta",
+        "Hon'ble Justice M.K. Gupta",
+        "Hon'ble Justice R.S. Chauhan"
+    ]
+    
+    # List of court halls
+    court_halls = ["Court Hall 1", "Court Hall 2", "Court Hall 3", "Court Hall 4"]
+    
+    # Assign a random judge and court hall
+    return num_cases, rng.choice(judges), rng.choice(court_halls)
+
+def cause_list_entries(court_type, court_name, date, document=None):
+    """
+    Yield the entries of a cause list opened with open_cause_list_async
+    
+    Entries of fetched pages are read from the already parsed document,
+    simulated lists are generated.
+    """
+    if document is not None:
+        return get_parser().cause_list_entries(document)
+    return iter_cause_list_entries(court_type, court_name, date)
+
+def iter_cause_list_entries(court_type, court_name, date):
+    """
+    Yield the entries of a cause list one at a time
+    
+    Args:
+        court_type (str): 'high' or 'district'
+        court_name (str): Name of the court
+        date (str): Date in YYYY-MM-DD format
         
-        # Assign a random judge and court hall
-        judge = random.choice(judges)
-        court_hall = random.choice(court_halls)
+    Yields:
+        dict: Cause list entry, in serial number order, from the simulation
+    """
+    rng = _cause_list_rng(court_type, court_name, date)
+    num_cases, _, _ = _cause_list_header(rng)
+    
+    # Generate random parties
+    petitioners = [
+        "Rajesh Kumar", "Sunil Sharma", "Priya Patel", "Amit Singh", 
+        "State of Maharashtra", "Union of India", "Municipal Corporation of Delhi"
+    ]
+    
+    respondents = [
+        "State of Karnataka", "Central Bureau of Investigation", 
+        "Ravi Shankar", "Meena Kumari", "Commissioner of Income Tax"
+    ]
+    
+    # Generate a random purpose
+    purposes = [
+        "For Hearing", "For Arguments", "For Final Disposal", 
+        "For Framing of Issues", "For Recording of Evidence",
+        "For Consideration of Application", "For Pronouncement of Judgment"
+    ]
+    
+    # Generate cases for the cause list
+    for i in range(1, num_cases + 1):
+        # Select a random case type
+        case_type_key = rng.choice(CASE_TYPE_CODES)
+        case_type_full = CASE_TYPES[case_type_key]
         
-        cause_list["judge"] = judge
-        cause_list["court_hall"] = court_hall
+        # Generate a random case number and year
+        case_number = str(rng.randint(100, 9999))
+        case_year = str(rng.randint(2015, 2023))
         
-        # Generate cases for the cause list
-        for i in range(1, num_cases + 1):
-            # Select a random case type
-            case_type_key = random.choice(list(CASE_TYPES.keys()))
-            case_type_full = CASE_TYPES[case_type_key]
-            
-            # Generate a random case number and year
-            case_number = str(random.randint(100, 9999))
-            case_year = str(random.randint(2015, 2023))
-            
-            # Generate random parties
-            petitioners = [
-                "Rajesh Kumar", "Sunil Sharma", "Priya Patel", "Amit Singh", 
-                "State of Maharashtra", "Union of India", "Municipal Corporation of Delhi"
-            ]
-            
-            respondents = [
-                "State of Karnataka", "Central Bureau of Investigation", 
-                "Ravi Shankar", "Meena Kumari", "Commissioner of Income Tax"
-            ]
-            
-            petitioner = random.choice(petitioners)
-            respondent = random.choice(respondents)
-            parties = f"{petitioner} vs {respondent}"
-            
-            # Generate a random purpose
-            purposes = [
-                "For Hearing", "For Arguments", "For Final Disposal", 
-                "For Framing of Issues", "For Recording of Evidence",
-                "For Consideration of Application", "For Pronouncement of Judgment"
-            ]
-            purpose = random.choice(purposes)
-            
-            # Add the case to the cause list
-            cause_list["cases"].append({
-                "serial_no": i,
-                "case_type": case_type_key,
-                "case_type_full": case_type_full,
-                "case_number": case_number,
-                "year": case_year,
-                "parties": parties,
-                "purpose": purpose,
-                "advocate": f"Adv. {random.choice(['S.K. Joshi', 'P.R. Patel', 'M.S. Reddy', 'A.K. Gupta', 'R.V. Singh'])}"
-            })
+        parties = f"{rng.choice(petitioners)} vs {rng.choice(respondents)}"
+        purpose = rng.choice(purposes)
         
-        return cause_list
-    
-    except Exception as e:
-        return {"error": f"Failed to fetch cause list: {str(e)}"}
\ No newline at end of file
+        yield {
+            "serial_no": i,
+            "case_type": case_type_key,
+            "case_type_full": case_type_full,
+            "case_number": case_number,
+            "year": case_year,
+            "parties": parties,
+            "purpose": purpose,
+            "advocate": f"Adv. {rng.choice(['S.K. Joshi', 'P.R. Patel', 'M.S. Reddy', 'A.K. Gupta', 'R.V. Singh'])}"
+        }
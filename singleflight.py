@@ -0,0 +1,44 @@
+import asyncio
+import copy
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one
+
+    While a call for a key is in flight, later callers with the same key
+    wait for it instead of starting their own. The work runs in its own
+    task, so a caller that is cancelled (for example a client that
+    disconnects) does not cancel it for everyone else. Every caller,
+    including the one that started the call, receives its own copy of the
+    result, so callers can never see each other's mutations.
+
+    Must only be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, factory, copy=copy.deepcopy):
+        """
+        Run factory() for key, or join the call already in flight
+
+        Args:
+            key (hashable): Identity of the call
+            factory (callable): Returns the coroutine to run
+            copy (callable): Makes each caller's copy of the result, a deep
+                copy by default
+
+        Returns:
+            A copy of the result of the coroutine
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return copy(await asyncio.shield(task))
+
+    def in_flight(self):
+        """Number of distinct calls currently running"""
+        return len(self._calls)
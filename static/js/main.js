@@ -68,11 +68,11 @@ $('#caseSearchForm').on('submit', function(e) {
     };
     
     // Send API request
+    // GET so the browser can reuse a cached result and revalidate it with its ETag
     $.ajax({
         url: '/api/search',
-        type: 'POST',
-        contentType: 'application/json',
-        data: JSON.stringify(data),
+        type: 'GET',
+        data: data,
         success: function(response) {
             // Hide loader
             $('#loader').hide();
@@ -158,9 +158,8 @@ $('#causeListForm').on('submit', function(e) {
     // Send API request
     $.ajax({
         url: '/api/causelist',
-        type: 'POST',
-        contentType: 'application/json',
-        data: JSON.stringify(data),
+        type: 'GET',
+        data: data,
         success: function(response) {
             // Hide loader
             $('#loader').hide();
@@ -212,12 +211,33 @@ $('#causeListForm').on('submit', function(e) {
     });
 });
 
+// Poll a download job until the document is ready
+function waitForDownload(jobId) {
+    $.ajax({
+        url: `/api/jobs/${jobId}`,
+        type: 'GET',
+        success: function(job) {
+            if (job.status === 'done' && job.file_path) {
+                // Create download link
+                window.location.href = `/downloads/${job.file_path}`;
+            } else if (job.status === 'failed') {
+                alert('Failed to download document.');
+            } else {
+                setTimeout(() => waitForDownload(jobId), 1000);
+            }
+        },
+        error: function() {
+            alert('An error occurred while downloading the document.');
+        }
+    });
+}
+
 // Handle document download
 $(document).on('click', '.download-btn', function() {
     const caseId = $(this).data('case-id');
     const docType = $(this).data('doc-type');
     
-    // Send download request
+    // Queue download job
     $.ajax({
         url: '/api/download',
         type: 'POST',
@@ -226,10 +246,9 @@ $(document).on('click', '.download-btn', function() {
             case_id: caseId,
             document_type: docType
         }),
-        success: function(response) {
-            if (response.file_path) {
-                // Create download link
-                window.location.href = `/downloads/${response.file_path}`;
+        success: function(job) {
+            if (job.job_id) {
+                waitForDownload(job.job_id);
             } else {
                 alert('Failed to download document.');
             }
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import batch_writer as batch_writer_module
+from batch_writer import BatchWriter
+from cache import write_cache_rows
+from models import CachedResult
+
+
+def cache_row(key, payload='{}'):
+    now = datetime.utcnow()
+    return {'kind': 'case', 'cache_key': key, 'payload': payload,
+            'stored_at': now, 'expires_at': now + timedelta(hours=1)}
+
+
+@pytest.fixture
+def writer(app):
+    writer = BatchWriter()
+    writer.app = app  # init_app would also flush at interpreter exit
+    writer.register('cache', write_cache_rows)
+    return writer
+
+
+def stored_keys():
+    return sorted(row.cache_key for row in CachedResult.query.all())
+
+
+def test_flush_writes_all_items_in_one_batch(writer):
+    for key in ('a', 'b', 'c'):
+        writer.submit('cache', cache_row(key))
+    assert writer.flush() == 3
+    assert stored_keys() == ['a', 'b', 'c']
+    assert writer.pending() == 0
+
+
+def test_rejected_item_is_dropped_and_the_others_are_written(writer):
+    writer.submit('cache', cache_row('a'))
+    writer.submit('cache', cache_row('bad', payload=None))  # violates NOT NULL
+    writer.submit('cache', cache_row('c'))
+
+    assert writer.flush() == 2
+    assert stored_keys() == ['a', 'c']
+    assert writer.dropped == 1
+    assert writer.pending() == 0
+
+    # Later flushes are not blocked by the rejected item
+    writer.submit('cache', cache_row('d'))
+    assert writer.flush() == 1
+    assert stored_keys() == ['a', 'c', 'd']
+
+
+def locked(batch):
+    raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+
+def test_operational_error_requeues_items_with_their_attempt_count(writer, monkeypatch):
+    monkeypatch.setattr(batch_writer_module, 'WRITE_MAX_ATTEMPTS', 3)
+    writer.register('cache', locked)
+    writer.submit('cache', cache_row('a'))
+    writer.submit('cache', cache_row('b'))
+
+    with pytest.raises(OperationalError):
+        writer.flush()
+    assert [(item['cache_key'], attempts) for _, item, attempts in writer._pending] == [('a', 1), ('b', 1)]
+
+    with pytest.raises(OperationalError):
+        writer.flush()
+    assert [attempts for _, _, attempts in writer._pending] == [2, 2]
+
+    # The last allowed attempt fails too, so the items are dropped
+    with pytest.raises(OperationalError):
+        writer.flush()
+    assert writer.pending() == 0
+    assert writer.dropped == 2
+
+
+def test_requeued_items_go_before_newer_ones_and_are_written_once_the_database_recovers(writer):
+    writer.register('cache', locked)
+    writer.submit('cache', cache_row('a'))
+    with pytest.raises(OperationalError):
+        writer.flush()
+
+    writer.register('cache', write_cache_rows)
+    writer.submit('cache', cache_row('b'))
+    assert [item['cache_key'] for _, item, _ in writer._pending] == ['a', 'b']
+    assert writer.flush() == 2
+    assert stored_keys() == ['a', 'b']
+
+
+def test_requeue_stays_within_max_pending(writer, monkeypatch):
+    monkeypatch.setattr(batch_writer_module, 'WRITE_MAX_PENDING', 3)
+    writer.register('cache', locked)
+    for key in ('a', 'b'):
+        writer.submit('cache', cache_row(key))
+    items, writer._pending = writer._pending, []
+    # Newer items fill the buffer while the failed flush was running
+    for key in ('c', 'd'):
+        writer.submit('cache', cache_row(key))
+
+    writer._requeue(items)
+    assert [item['cache_key'] for _, item, _ in writer._pending] == ['a', 'c', 'd']
+    assert writer.dropped == 1
+
+
+def test_submit_drops_items_when_the_buffer_is_full(writer, monkeypatch):
+    monkeypatch.setattr(batch_writer_module, 'WRITE_MAX_PENDING', 2)
+    for key in ('a', 'b', 'c'):
+        writer.submit('cache', cache_row(key))
+    assert writer.pending() == 2
+    assert writer.dropped == 1
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache import ResultCache, case_key
+from models import CachedResult, db
+
+
+@pytest.fixture
+def cache(app):
+    return ResultCache('case', lambda result: 3600, max_entries=2)
+
+
+def test_case_keys_are_normalized():
+    assert case_key('High', ' Delhi ', 'cwp', '0123', '2022') == case_key('high', 'Delhi', 'CWP', '123', '2022')
+
+
+def test_get_or_fetch_fetches_once(cache):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'status': 'Pending'}
+
+    assert cache.get_or_fetch('a', fetch) == ({'status': 'Pending'}, False)
+    assert cache.get_or_fetch('a', fetch) == ({'status': 'Pending'}, True)
+    assert len(calls) == 1
+
+
+def test_errors_are_not_cached(cache):
+    cache.put('a', {'error': 'Court not found'})
+    assert cache.get('a') is None
+    assert CachedResult.query.count() == 0
+
+
+def test_persistent_tier_serves_entries_evicted_from_memory(cache):
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'key': key})
+    assert list(cache._entries) == ['b', 'c']
+    assert cache.get('a') == {'key': 'a'}
+    assert list(cache._entries) == ['c', 'a']
+
+
+def test_expired_entries_are_only_served_stale(cache):
+    cache.put('a', {'key': 'a'}, ttl=60)
+    row = CachedResult.query.filter_by(cache_key='a').one()
+    row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    cache._entries.clear()
+
+    assert cache.get('a') is None
+    assert cache.get('a', allow_stale=True) == {'key': 'a'}
+
+
+def test_ttl_override(cache):
+    cache.put('a', {'key': 'a'}, ttl=86400)
+    stored_at, expires_at = cache.freshness('a')
+    assert expires_at - stored_at == timedelta(days=1)
@@ -0,0 +1,42 @@
+import pytest
+
+from courts import CaseId
+
+
+def test_round_trip():
+    case = CaseId('high', 'Delhi', '1234', '2019')
+    assert str(case) == 'HC03-1234-2019'
+    assert CaseId.decode(str(case)) == case
+
+
+def test_case_number_with_separator_round_trips():
+    case = CaseId('district', 'Kochi', '12-A', '2020')
+    assert CaseId.decode(str(case)) == case
+
+
+@pytest.mark.parametrize('case_id, expected', [
+    ('HC312342019', CaseId('high', 'Delhi', '1234', '2019')),  # unpadded, only court 3 fits
+    ('HC0312342019', CaseId('high', 'Delhi', '1234', '2019')),  # padded, no separator
+    ('DC0812342020', CaseId('district', 'Pune', '1234', '2020')),
+])
+def test_unambiguous_legacy_ids_decode(case_id, expected):
+    assert CaseId.decode(case_id) == expected
+
+
+@pytest.mark.parametrize('case_id', ['HC1222022', 'DC11232020'])
+def test_ambiguous_legacy_ids_are_rejected(case_id):
+    # HC1222022 is case 22 of Allahabad (1) or case 2 of Punjab and Haryana (12)
+    with pytest.raises(ValueError, match='Ambiguous'):
+        CaseId.decode(case_id)
+
+
+@pytest.mark.parametrize('case_id', ['', 'HC', 'XX03-1-2019', 'HC99-1-2019', 'HC03--2019', 'HC03-1-19'])
+def test_invalid_ids_are_rejected(case_id):
+    with pytest.raises(ValueError):
+        CaseId.decode(case_id)
+
+
+@pytest.mark.parametrize('case_id', [1222022, None, ['HC03-1-2019']])
+def test_non_string_ids_are_rejected(case_id):
+    with pytest.raises(ValueError):
+        CaseId.decode(case_id)
@@ -0,0 +1,93 @@
+import pytest
+
+import limits
+from limits import CircuitBreaker, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(limits.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_spaces_requests_at_the_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.reserve()
+    clock.now += 60
+    assert bucket.state()['tokens'] == 3
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_bucket_state_does_not_change_the_bucket(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    bucket.reserve()
+    clock.now += 0.25
+    tokens, updated = bucket.tokens, bucket.updated
+    assert bucket.state()['tokens'] == 2.5
+    assert (bucket.tokens, bucket.updated) == (tokens, updated)
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(max_failures=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.status == 'open'
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+
+
+def test_breaker_lets_one_trial_through_after_the_reset_timeout(clock):
+    breaker = CircuitBreaker(max_failures=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.status == 'half_open'
+    assert not breaker.allow()  # the trial is still in flight
+    breaker.record_success()
+    assert breaker.status == 'closed'
+    assert breaker.allow()
+
+
+def test_failed_trial_opens_the_breaker_again(clock):
+    breaker = CircuitBreaker(max_failures=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.status == 'open'
+    assert breaker.retry_after() == 30
+
+
+def test_budgets_are_shared_between_processes(monkeypatch):
+    monkeypatch.setattr(limits, '_limiters', {})
+    monkeypatch.setattr(limits, 'COURT_RATE', 2.0)
+    monkeypatch.setattr(limits, 'COURT_BURST', 5.0)
+    monkeypatch.setattr(limits, '_processes', 1)
+    limits.share_between(4)
+    bucket = limits.limiter('high:3')
+    assert (bucket.rate, bucket.capacity) == (0.5, 1.25)
+    limits.share_between(8)
+    assert limits.limiter('high:3').capacity == 1.0  # never below one request
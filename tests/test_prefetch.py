@@ -0,0 +1,24 @@
+from datetime import date, datetime
+
+import pytest
+
+from prefetch import in_window, seconds_until_end_of, target_date
+
+
+@pytest.mark.parametrize('now, expected', [
+    (datetime(2024, 7, 15, 22, 0), date(2024, 7, 16)),  # evening pass prepares for tomorrow
+    (datetime(2024, 7, 16, 1, 0), date(2024, 7, 16)),  # after midnight the day has come
+    (datetime(2024, 7, 16, 5, 59), date(2024, 7, 16)),
+])
+def test_target_date_in_default_window(now, expected):
+    assert in_window(now, '22-6')
+    assert target_date(now, '22-6') == expected
+
+
+def test_target_date_of_afternoon_window_is_next_day():
+    assert target_date(datetime(2024, 7, 16, 14, 0), '13-17') == date(2024, 7, 17)
+
+
+def test_prefetched_entries_last_through_the_day():
+    now = datetime(2024, 7, 16, 1, 0)
+    assert seconds_until_end_of(date(2024, 7, 16), now) == 23 * 3600
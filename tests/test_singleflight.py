@@ -0,0 +1,91 @@
+import asyncio
+
+from singleflight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'cases': [1, 2]}
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*[flight.do('key', fetch) for _ in range(5)])
+        return flight, results
+
+    flight, results = run(main())
+    assert len(calls) == 1
+    assert all(result == {'cases': [1, 2]} for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_every_caller_gets_its_own_copy():
+    shared = {'cases': [1, 2]}
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return shared
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(*[flight.do('key', fetch) for _ in range(3)])
+
+    results = run(main())
+    results[0]['cases'].append(3)  # the caller that started the call
+    assert results[1]['cases'] == [1, 2]
+    assert all(result is not shared for result in results)
+    assert shared == {'cases': [1, 2]}
+
+
+def test_copy_function_decides_what_is_shared():
+    document = object()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return {'judge': 'A'}, document
+
+    async def main():
+        flight = SingleFlight()
+        copy = lambda result: (dict(result[0]), result[1])
+        return await asyncio.gather(*[flight.do('key', fetch, copy=copy) for _ in range(2)])
+
+    (first, first_document), (second, second_document) = run(main())
+    assert first is not second
+    assert first_document is second_document is document
+
+
+def test_cancelled_caller_does_not_cancel_the_call():
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return 'done'
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do('key', fetch))
+        second = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert run(main()) == 'done'
+
+
+def test_calls_after_completion_run_again():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        flight = SingleFlight()
+        return [await flight.do('key', fetch), await flight.do('key', fetch)]
+
+    assert run(main()) == [1, 2]
@@ -0,0 +1,229 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from cache import case_cache, case_key
+from models import db, CaseQuery, CaseChange, WatchedCase
+from scraper import iter_case_details
+
+# Watchlist polling settings, intervals in seconds
+WATCH_MIN_INTERVAL = int(os.environ.get('WATCH_MIN_INTERVAL', '900'))
+WATCH_MAX_INTERVAL = int(os.environ.get('WATCH_MAX_INTERVAL', str(7 * 24 * 3600)))
+WATCH_BATCH_SIZE = int(os.environ.get('WATCH_BATCH_SIZE', '50'))
+WATCH_TICK = float(os.environ.get('WATCH_TICK', '30'))  # longest the scheduler sleeps between checks
+WATCH_LEASE = 300  # seconds a claimed watch is hidden from other schedulers
+
+
+def diff_case(old, new):
+    """
+    Describe what changed between two fetch_case_details results
+
+    Only the fields worth notifying about are compared: status, next
+    hearing date, and documents that were not listed before.
+
+    Returns:
+        dict: Changed fields, empty when nothing changed
+    """
+    changes = {}
+    for field in ('status', 'next_hearing_date'):
+        if old.get(field) != new.get(field):
+            changes[field] = {'from': old.get(field), 'to': new.get(field)}
+
+    known = {doc.get('id') for doc in old.get('documents', [])}
+    added = [doc for doc in new.get('documents', []) if doc.get('id') not in known]
+    if added:
+        changes['new_documents'] = added
+    return changes
+
+
+def interval_ceiling(snapshot, today=None):
+    """Longest polling interval appropriate for a case, based on its status and next hearing"""
+    if snapshot.get('status') == 'Disposed':
+        return WATCH_MAX_INTERVAL
+
+    hearing = snapshot.get('next_hearing_date')
+    if not hearing:
+        return 24 * 3600
+    try:
+        days = (datetime.strptime(hearing, '%Y-%m-%d').date() - (today or datetime.now().date())).days
+    except ValueError:
+        return 24 * 3600
+    if days <= 1:
+        return WATCH_MIN_INTERVAL
+    if days <= 7:
+        return 6 * 3600
+    return 24 * 3600
+
+
+def next_interval(snapshot, changed, previous):
+    """
+    Adaptive polling interval
+
+    A change resets the interval to the minimum, and each quiet poll
+    doubles it up to the ceiling for the case, so quiet cases cost
+    almost nothing and active ones are followed closely.
+    """
+    ceiling = max(WATCH_MIN_INTERVAL, interval_ceiling(snapshot))
+    if changed or not previous:
+        return WATCH_MIN_INTERVAL
+    return min(ceiling, max(WATCH_MIN_INTERVAL, previous * 2))
+
+
+def add_watch(court_type, court_name, case_type, case_number, year):
+    """
+    Start watching a case, seeding it from the latest successful query
+
+    Returns:
+        tuple: (WatchedCase, created)
+    """
+    watch = WatchedCase.query.filter_by(
+        court_type=court_type, court_name=court_name,
+        case_type=case_type, case_number=case_number, year=year
+    ).first()
+    if watch is not None:
+        return watch, False
+
+    latest = (
+        CaseQuery.query
+        .filter_by(court_type=court_type, court_name=court_name,
+                   case_type=case_type, case_number=case_number, year=year, status='success')
+        .order_by(CaseQuery.query_date.desc())
+        .first()
+    )
+    watch = WatchedCase(
+        court_type=court_type, court_name=court_name,
+        case_type=case_type, case_number=case_number, year=year,
+        poll_interval=WATCH_MIN_INTERVAL,
+        next_poll_at=datetime.utcnow()
+    )
+    if latest is not None:
+        # Already have a baseline, so the first poll can wait a full interval
+        watch.query_id = latest.id
+        watch.snapshot = latest.response
+        watch.next_poll_at = datetime.utcnow() + timedelta(seconds=WATCH_MIN_INTERVAL)
+    db.session.add(watch)
+    db.session.commit()
+    watch_scheduler.notify()
+    return watch, True
+
+
+def remove_watch(watch):
+    CaseChange.query.filter_by(watch_id=watch.id).delete(synchronize_session=False)
+    db.session.delete(watch)
+    db.session.commit()
+
+
+class WatchScheduler:
+    """
+    Background thread that polls only the watches that are due
+
+    Due watches are found through the index on next_poll_at, so the work
+    per tick depends on how many cases are due rather than how many are
+    watched.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def start(self):
+        """Start the scheduler thread once per process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._run, name='watch-scheduler', daemon=True)
+            thread.start()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                try:
+                    polled = self.poll_due()
+                    delay = 0 if polled >= WATCH_BATCH_SIZE else self._seconds_until_next()
+                except Exception:
+                    db.session.rollback()
+                    delay = WATCH_TICK
+                finally:
+                    db.session.remove()
+                if delay:
+                    self._wakeup.wait(delay)
+                    self._wakeup.clear()
+
+    def poll_due(self):
+        """
+        Poll one batch of due watches and record their changes
+
+        Returns:
+            int: Number of watches polled
+        """
+        watches = self._claim_due()
+        if not watches:
+            return 0
+
+        queries = [{
+            'court_type': w.court_type, 'court_name': w.court_name,
+            'case_type': w.case_type, 'case_number': w.case_number, 'year': w.year,
+        } for w in watches]
+
+        now = datetime.utcnow()
+        for index, result in iter_case_details(queries):
+            watch = watches[index]
+            watch.last_polled_at = now
+            previous = json.loads(watch.snapshot) if watch.snapshot else None
+            changed = False
+            if 'error' not in result:
+                case_cache.put(case_key(**queries[index]), result)
+                changes = diff_case(previous, result) if previous is not None else {}
+                if changes:
+                    changed = True
+                    watch.last_changed_at = now
+                    db.session.add(CaseChange(watch_id=watch.id, detected_at=now, changes=json.dumps(changes)))
+                watch.snapshot = json.dumps(result)
+            snapshot = result if 'error' not in result else (previous or {})
+            watch.poll_interval = next_interval(snapshot, changed, watch.poll_interval)
+            watch.next_poll_at = now + timedelta(seconds=watch.poll_interval)
+        db.session.commit()
+        return len(watches)
+
+    def _claim_due(self):
+        now = datetime.utcnow()
+        due = (
+            WatchedCase.query
+            .filter(WatchedCase.next_poll_at <= now)
+            .order_by(WatchedCase.next_poll_at)
+            .limit(WATCH_BATCH_SIZE)
+            .all()
+        )
+        # Push the claimed watches forward so other processes skip them
+        lease = now + timedelta(seconds=WATCH_LEASE)
+        claimed = []
+        for watch in due:
+            updated = (
+                WatchedCase.query
+                .filter(WatchedCase.id == watch.id, WatchedCase.next_poll_at == watch.next_poll_at)
+                .update({'next_poll_at': lease}, synchronize_session=False)
+            )
+            if updated:
+                claimed.append(watch)
+        db.session.commit()
+        return claimed
+
+    def _seconds_until_next(self):
+        upcoming = WatchedCase.query.order_by(WatchedCase.next_poll_at).first()
+        if upcoming is None:
+            return WATCH_TICK
+        seconds = (upcoming.next_poll_at - datetime.utcnow()).total_seconds()
+        return min(WATCH_TICK, max(0.1, seconds))
+
+
+watch_scheduler = WatchScheduler()